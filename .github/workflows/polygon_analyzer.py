@@ -37,17 +37,35 @@ DAILY_DIR = Path("/mnt/project")  # Daily CSVs from project files
 # =============================================================================
 def calculate_rsi_wilder(prices, period=10):
     """Wilder's RSI matching our signal monitor."""
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    # fillna keeps the where() seeding: the leading NaN diff counts as 0
+    delta = prices.diff().fillna(0)
+    gain = delta.clip(lower=0)
+    loss = (-delta).clip(lower=0)
     avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
     avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
     rs = avg_gain / avg_loss
     return 100 - (100 / (1 + rs))
 
 
+# Daily frames with indicators, keyed by (ticker, use_adj_close). Signal
+# functions reload SPY and friends repeatedly; RSI/SMA are built once.
+_DAILY_CACHE = {}
+
+
 def load_daily(ticker, use_adj_close=False):
-    """Load daily data from project CSVs."""
+    """Load daily data from project CSVs (memoized per ticker).
+
+    Returns a copy; callers add columns (date_key) to their frame.
+    """
+    key = (ticker, use_adj_close)
+    if key not in _DAILY_CACHE:
+        _DAILY_CACHE[key] = _read_daily(ticker, use_adj_close)
+    df = _DAILY_CACHE[key]
+    return df.copy() if df is not None else None
+
+
+def _read_daily(ticker, use_adj_close):
+    """Read one daily CSV and attach RSI/SMA columns."""
     # Handle special tickers
     filename_map = {
         "BTC-USD": "BTCUSD",
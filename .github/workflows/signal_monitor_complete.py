@@ -22,16 +22,34 @@ SCHEDULE: Two emails daily (weekdays)
 - 4:05 PM ET: Market close confirmation
 """
 
+import io
 import os
+import atexit
 import yfinance as yf
 import pandas as pd
 import numpy as np
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import sys
+import gzip
+import pickle
+import hashlib
+from dataclasses import dataclass
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional — the kernels below run as plain Python without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    prange = range
 
 # =============================================================================
 # CONFIGURATION
@@ -40,26 +58,219 @@ SENDER_EMAIL = os.environ.get('SENDER_EMAIL', '')
 SENDER_PASSWORD = os.environ.get('SENDER_PASSWORD', '')
 RECIPIENT_EMAIL = os.environ.get('RECIPIENT_EMAIL', '')
 PHONE_EMAIL = os.environ.get('PHONE_EMAIL', '')
+EMAIL_CONFIGURED = bool(SENDER_EMAIL and SENDER_PASSWORD and RECIPIENT_EMAIL)
 
 IS_PRECLOSE = len(sys.argv) > 1 and sys.argv[1] == 'preclose'
 
+# Same-day download cache shared by the pre-close and close runs
+CACHE_DIR = '.cache'
+
+# Email separators, built once
+SEP_HEAVY = '=' * 70
+SEP_LIGHT = '─' * 70
+SEP_SUB = '─' * 50
+SEP_DASH = '-' * 50
+ALERT_HEAD_BUY = f"🟢 BUY SIGNALS:\n{SEP_DASH}\n"
+ALERT_HEAD_EXIT = f"🔴 EXIT/SHORT SIGNALS:\n{SEP_DASH}\n"
+ALERT_HEAD_WARN = f"🟡 WARNINGS/WATCH:\n{SEP_DASH}\n"
+
+# Alert type → email group (0 buy, 1 exit/short, 2 warning/watch)
+ALERT_GROUPS = {'buy': 0, 'exit': 1, 'short': 1, 'warning': 2, 'hedge': 2, 'watch': 2}
+
+# Open-Meteo NYC forecast — only the first 7 days feed the natgas signals
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+NYC_FORECAST_PARAMS = {
+    'latitude': 40.74, 'longitude': -74.04,
+    'daily': 'temperature_2m_max,temperature_2m_min',
+    'temperature_unit': 'fahrenheit',
+    'forecast_days': 8,
+    'timezone': 'America/New_York',
+}
+# Upper bound on waiting for the background forecast (retries included)
+WEATHER_TIMEOUT = 12
+
+# Shared HTTP session: keeps the TLS connection alive and retries transient errors
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                                       max_retries=Retry(total=2, backoff_factor=0.5)))
+
+# Everything the monitor downloads
+TICKERS = (
+    # Core Indices
+    'SMH', 'SPY', 'QQQ', 'IWM',
+    # Defensive Sectors
+    'XLP', 'XLU', 'XLV',
+    # Safe Havens & Macro
+    'GLD', 'TLT', 'HYG', 'LQD', 'TMV',
+    'USDU', 'UCO', 'BOIL',
+    # Bonds (for bond momentum)
+    'BND',
+    # Volatility
+    'UVXY',
+    # International
+    'EDC', 'YINN', 'KORU', 'EURL', 'INDL',
+    # Crypto
+    'BTC-USD',
+    # Individual Stocks
+    'AMD', 'NVDA',
+    # 3x Leveraged ETFs
+    'NAIL', 'CURE', 'FAS', 'LABU',
+    'TQQQ', 'SOXL', 'TECL', 'DRN', 'UPRO',
+    # Style/Factor ETFs
+    'VOOV', 'VOOG', 'VTV', 'QQQE',
+    # Energy/Financials
+    'XLE', 'XLF',
+    # Natural Gas (KOLD for fade signals)
+    'KOLD',
+)
+
+# Tickers read by the playbook proximity section of the email
+PLAYBOOK_TICKERS = ('GLD', 'USDU', 'XLP', 'XLU', 'XLV', 'SPY', 'QQQ', 'SMH',
+                    'XLF', 'UVXY', 'BTC-USD', 'FAS', 'CURE', 'LABU')
+_PLAYBOOK_IDX = {t: i for i, t in enumerate(PLAYBOOK_TICKERS)}
+# PLAYBOOK_TEMPLATE field name of each playbook ticker ('BTC-USD' → 'btc')
+_PLAYBOOK_KEYS = tuple(t.split('-')[0].lower() for t in PLAYBOOK_TICKERS)
+
+# Background I/O (weather forecast) overlapped with indicator math
+_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# NYSE full-day closures; scheduled runs on these dates are skipped.
+# Covers 2025-2027 only: extend with the next year's NYSE calendar before
+# the end of 2027 (main() warns once the current year is past the table)
+NYSE_HOLIDAYS = np.array([
+    '2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18',
+    '2025-05-26', '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27',
+    '2025-12-25',
+    '2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25',
+    '2026-06-19', '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25',
+    '2027-01-01', '2027-01-18', '2027-02-15', '2027-03-26', '2027-05-31',
+    '2027-06-18', '2027-07-05', '2027-09-06', '2027-11-25', '2027-12-24',
+], dtype='datetime64[D]')
+NYSE_HOLIDAYS_LAST_YEAR = int(str(NYSE_HOLIDAYS[-1])[:4])
+
 # =============================================================================
 # CALCULATIONS
 # =============================================================================
 def calculate_rsi_wilder(prices, period):
     """Calculate Wilder's RSI"""
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+    values = _rsi_wilder_loop(prices.to_numpy(dtype=np.float64), period)
+    return pd.Series(values, index=prices.index)
+
+@njit(cache=True)
+def _rsi_wilder_loop(prices, period):
+    """Wilder's RSI series — same values as the pandas form
+    gain/loss.ewm(alpha=1/period, min_periods=period, adjust=False)"""
+    n = len(prices)
+    out = np.full(n, np.nan)
+    alpha = 1.0 / period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(n):
+        if i > 0:
+            delta = prices[i] - prices[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (1.0 - alpha) * avg_gain + alpha * gain
+            avg_loss = (1.0 - alpha) * avg_loss + alpha * loss
+        if i < period - 1:
+            continue
+        if avg_loss > 0:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[i] = 100.0
+    return out
+
+@njit(cache=True)
+def rsi_wilder_last(prices, period):
+    """Latest Wilder's RSI from a 1-D float array.
+
+    Same recurrence as calculate_rsi_wilder (ewm seeded at the first bar,
+    alpha=1/period) but returns only the final value — no Series built.
+    """
+    n = len(prices)
+    if n < period:
+        return np.nan
+    alpha = 1.0 / period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        delta = prices[i] - prices[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (1.0 - alpha) * avg_gain + alpha * gain
+        avg_loss = (1.0 - alpha) * avg_loss + alpha * loss
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else np.nan
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+@njit(cache=True)
+def _ewm_step(avg, weight, x, alpha):
+    """One ewm(adjust=False) update, step for step with pandas (NaN-aware)"""
+    if avg == avg:
+        weight *= 1.0 - alpha
+        if x == x:
+            if avg != x:
+                avg = (weight * avg + alpha * x) / (weight + alpha)
+            weight = 1.0
+    elif x == x:
+        avg = x
+    return avg, weight
+
+@njit(cache=True)
+def _compute_all_indicators(prices):
+    """RSI(10/50), SMA(200/50) and EMA(9/20/50/200) of the last bar.
+    
+    One pass over the close array instead of a pandas call per indicator;
+    averages follow ewm(adjust=False) exactly so values match the Series forms.
+    """
+    n = len(prices)
+    ema_alpha = np.array([2.0 / (9 + 1), 2.0 / (20 + 1), 2.0 / (50 + 1), 2.0 / (200 + 1)])
+    ema = np.full(4, prices[0])
+    ema_wt = np.ones(4)
+    rsi_alpha = np.array([1.0 / 10, 1.0 / 50])
+    avg_gain = np.zeros(2)
+    avg_loss = np.zeros(2)
+    gain_wt = np.ones(2)
+    loss_wt = np.ones(2)
+    
+    for i in range(1, n):
+        x = prices[i]
+        for k in range(4):
+            ema[k], ema_wt[k] = _ewm_step(ema[k], ema_wt[k], x, ema_alpha[k])
+        delta = x - prices[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        for k in range(2):
+            avg_gain[k], gain_wt[k] = _ewm_step(avg_gain[k], gain_wt[k], gain, rsi_alpha[k])
+            avg_loss[k], loss_wt[k] = _ewm_step(avg_loss[k], loss_wt[k], loss, rsi_alpha[k])
+    
+    rsi = np.full(2, np.nan)
+    for k, period in enumerate((10, 50)):
+        if n < period:
+            continue
+        if avg_loss[k] > 0:
+            rsi[k] = 100.0 - 100.0 / (1.0 + avg_gain[k] / avg_loss[k])
+        elif avg_gain[k] > 0:
+            rsi[k] = 100.0
+    
+    # Rolling means of the trailing window (NaN if short or any gap, as pandas)
+    sma = np.full(2, np.nan)
+    for k, window in enumerate((200, 50)):
+        if n >= window:
+            sma[k] = prices[n - window:].sum() / window
+    
+    return rsi[0], rsi[1], sma[0], sma[1], ema[0], ema[1], ema[2], ema[3]
 
 def safe_float(value):
     """Safely convert a value to float, handling Series and arrays"""
+    # Fast path: kernels and array reads hand back plain/numpy floats
+    t = type(value)
+    if t is float:
+        return value if value == value else 0.0
+    if t is np.float64 or t is int:
+        return float(value) if value == value else 0.0
     if isinstance(value, pd.Series):
-        return float(value.iloc[-1]) if len(value) > 0 else 0.0
+        return float(value.iat[-1]) if len(value) > 0 else 0.0
     elif isinstance(value, np.ndarray):
         return float(value[-1]) if len(value) > 0 else 0.0
     elif pd.isna(value):
@@ -67,34 +278,183 @@ def safe_float(value):
     else:
         return float(value)
 
+@dataclass(slots=True)
+class TickerIndicators:
+    """Latest-bar indicators for one ticker"""
+    price: float
+    rsi10: float
+    rsi50: float
+    sma200: float
+    sma50: float
+    ema9: float
+    ema20: float
+    ema50: float
+    ema200: float
+    pct_above_sma200: float
+    above_ema9: bool
+    above_ema20: bool
+    above_ema50: bool
+    above_ema200: bool
+    ema_mask: int  # above_ema9..above_ema200 packed as bits 0..3
+
+# Latest TickerIndicators per ticker, keyed by series_key()
+_INDICATOR_CACHE = {}
+
+def series_key(close):
+    """Cheap identity for a Close series: (bars, last timestamp, last close)"""
+    return (len(close), close.index[-1], close.iat[-1])
+
+def compute_indicators(close):
+    """Calculate latest-bar indicators from a Close series"""
+    prices = close.to_numpy(dtype=np.float64)
+    # RSI 10/50, SMA 200/50, EMAs 9/20/50/200 — one fused pass
+    return _make_indicators(prices[-1], _compute_all_indicators(prices))
+
+def compute_indicators_batch(closes):
+    """compute_indicators for many Close series at once.
+    
+    All series are packed end to end into one float64 array (offsets mark
+    each ticker's slice) and the fused kernel runs over them in parallel.
+    """
+    arrays = [close.to_numpy(dtype=np.float64) for close in closes.values()]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([a.size for a in arrays], out=offsets[1:])
+    values = _compute_all_indicators_batch(np.concatenate(arrays), offsets)
+    return {ticker: _make_indicators(prices[-1], row)
+            for ticker, prices, row in zip(closes, arrays, values.tolist())}
+
+@njit(cache=True, parallel=True)
+def _compute_all_indicators_batch(flat, offsets):
+    """_compute_all_indicators for each flat[offsets[j]:offsets[j + 1]], one row per ticker"""
+    n = len(offsets) - 1
+    out = np.empty((n, 8))
+    for j in prange(n):
+        values = _compute_all_indicators(flat[offsets[j]:offsets[j + 1]])
+        for k in range(8):
+            out[j, k] = values[k]
+    return out
+
+def _make_indicators(last_close, values):
+    """TickerIndicators from the last close and the 8 fused-kernel outputs"""
+    price = safe_float(last_close)
+    rsi10, rsi50, sma200, sma50, ema9, ema20, ema50, ema200 = (safe_float(v) for v in values)
+    
+    # EMA trend flags — one comparison against the stacked EMAs
+    above_ema9, above_ema20, above_ema50, above_ema200 = (
+        price > np.array([ema9, ema20, ema50, ema200])).tolist()
+    
+    return TickerIndicators(
+        price=price, rsi10=rsi10, rsi50=rsi50,
+        sma200=sma200, sma50=sma50,
+        ema9=ema9, ema20=ema20, ema50=ema50, ema200=ema200,
+        # % above SMA200
+        pct_above_sma200=(price / sma200 - 1) * 100 if sma200 > 0 else 0,
+        above_ema9=above_ema9, above_ema20=above_ema20,
+        above_ema50=above_ema50, above_ema200=above_ema200,
+        ema_mask=above_ema9 | above_ema20 << 1 | above_ema50 << 2 | above_ema200 << 3,
+    )
+
+def _download_one(ticker, period):
+    """Single-ticker download, used to retry tickers the batch call missed"""
+    try:
+        # Ticker.history keeps its state per object, unlike yf.download's
+        # module-level result dicts, so it is safe to run from worker threads
+        df = yf.Ticker(ticker).history(period=period, actions=False)[['Close']]
+        if len(df) > 0:
+            df.index = df.index.tz_localize(None)
+            return df
+    except Exception as e:
+        print(f"Error downloading {ticker}: {e}")
+    return None
+
 def download_data(tickers, period='2y'):
-    """Download data for multiple tickers"""
+    """Download data for multiple tickers in one batched request"""
     data = {}
+    try:
+        raw = yf.download(list(tickers), period=period, group_by='ticker',
+                          threads=True, progress=False)
+        downloaded = set(raw.columns.get_level_values(0))
+    except Exception as e:
+        print(f"Error downloading batch: {e}")
+        downloaded = set()
+    
+    # Columns are (ticker, field); calendars differ (BTC trades weekends),
+    # so drop each ticker's all-NaN rows after splitting. Only Close is used
+    # downstream — drop OHLV here rather than carry it through the cache.
     for ticker in tickers:
+        if ticker not in downloaded:
+            continue
         try:
-            df = yf.download(ticker, period=period, progress=False)
+            df = raw[ticker][['Close']].dropna(how='all')
             if len(df) > 0:
-                # Flatten multi-index columns if present
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
                 data[ticker] = df
         except Exception as e:
             print(f"Error downloading {ticker}: {e}")
+    
+    # Retry whatever the batch dropped one ticker at a time, in parallel
+    missing = [t for t in tickers if t not in data]
+    if missing:
+        print(f"Retrying {len(missing)} ticker(s) individually: {', '.join(missing)}")
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            for ticker, df in zip(missing, pool.map(lambda t: _download_one(t, period), missing)):
+                if df is not None:
+                    data[ticker] = df
+        data = {t: data[t] for t in tickers if t in data}
+    return data
+
+def _price_cache_path(tickers):
+    """Same-day cache file for a ticker set"""
+    key = hashlib.sha1(','.join(sorted(tickers)).encode()).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"prices_{datetime.now():%Y%m%d}_{key}.pkl.gz")
+
+def download_data_cached(tickers, period='2y'):
+    """Download data, reusing today's earlier run (pre-close) when cached.
+    
+    A cache hit only re-downloads the last few sessions and splices them over
+    the cached history, so today's bar is always fresh.
+    """
+    path = _price_cache_path(tickers)
+    cached = {}
+    if os.path.exists(path):
+        try:
+            with gzip.open(path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            print(f"Error reading price cache: {e}")
+    
+    if cached:
+        fresh = download_data([t for t in tickers if t in cached], period='5d')
+        data = {}
+        for ticker, recent in fresh.items():
+            df = pd.concat([cached[ticker], recent])
+            data[ticker] = df[~df.index.duplicated(keep='last')].sort_index()
+        # Anything not cached or not refreshed gets a full download
+        missing = [t for t in tickers if t not in data]
+        if missing:
+            data.update(download_data(missing, period=period))
+        data = {t: data[t] for t in tickers if t in data}
+        print(f"Price cache hit: refreshed {len(fresh)} tickers, full download for {len(missing)}")
+    else:
+        data = download_data(tickers, period=period)
+    
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for name in os.listdir(CACHE_DIR):
+            if name.startswith('prices_') and name != os.path.basename(path):
+                os.remove(os.path.join(CACHE_DIR, name))
+        with gzip.open(path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"Error writing price cache: {e}")
     return data
 
 # =============================================================================
 # NATGAS SIGNALS (BOIL/KOLD)
 # =============================================================================
 def get_weather_forecast():
-    """Pull NYC 16-day forecast from Open-Meteo (free, no API key)."""
+    """Pull NYC 8-day forecast from Open-Meteo (free, no API key)."""
     try:
-        url = ("https://api.open-meteo.com/v1/forecast"
-               "?latitude=40.74&longitude=-74.04"
-               "&daily=temperature_2m_max,temperature_2m_min"
-               "&temperature_unit=fahrenheit"
-               "&forecast_days=16"
-               "&timezone=America/New_York")
-        resp = requests.get(url, timeout=10)
+        resp = _SESSION.get(OPEN_METEO_URL, params=NYC_FORECAST_PARAMS, timeout=10)
         data = resp.json()
         daily = data.get('daily', {})
         dates = daily.get('time', [])
@@ -118,7 +478,103 @@ def get_weather_forecast():
         return {}
 
 
-def check_natgas_signals(data, indicators):
+# Natgas heating season (BOIL long entries, weather prefetch)
+WINTER_MONTHS = (11, 12, 1, 2, 3)
+
+# KOLD fade tiers, checked top-down (last row has the lowest gain):
+# (min BOIL 5d gain %, BOIL RSI must exceed, signal, tier, reasoning template)
+KOLD_TIERS = (
+    (50, float('-inf'), 'ACTIVE', 'TIER 1',
+     'BOIL 5d gain {gain_5d:+.1f}% >= 50% → 100% win, +25.4% avg (n=7)'),
+    (40, float('-inf'), 'ACTIVE', 'TIER 1',
+     'BOIL 5d gain {gain_5d:+.1f}% >= 40% → 89% win, +18.5% avg (n=9)'),
+    (30, 70, 'ACTIVE', 'TIER 2',
+     'BOIL 5d gain {gain_5d:+.1f}% >= 30% + RSI {boil_rsi:.1f} > 70 → 92% win (n=12)'),
+    (30, float('-inf'), 'ACTIVE', 'TIER 2',
+     'BOIL 5d gain {gain_5d:+.1f}% >= 30% → 88% win, +14.5% avg (n=24)'),
+    (20, float('-inf'), 'WATCH', 'TIER 3',
+     'BOIL 5d gain {gain_5d:+.1f}% >= 20% → 66% win (n=76), partial position'),
+)
+_KOLD_MIN_GAIN = np.array([row[0] for row in KOLD_TIERS], dtype=np.float64)
+_KOLD_MIN_RSI = np.array([row[1] for row in KOLD_TIERS], dtype=np.float64)
+_KOLD_ACTIVE = np.array([row[2] == 'ACTIVE' for row in KOLD_TIERS])
+
+# BOIL long-entry outcomes of natgas_decision(): (entry, reasoning template)
+BOIL_ENTRY_CASES = (
+    (None, None),
+    ('ACTIVE', 'BUY BOIL: Winter + RSI {boil_rsi:.1f} < 50 + cold {temp_change:+.1f}°F'),
+    ('WATCH', 'Watch BOIL: RSI {boil_rsi:.1f} < 35 + cooling {temp_change:+.1f}°F'),
+    ('WATCH', 'BOIL RSI {boil_rsi:.1f} < 21 → extreme oversold'),
+)
+
+@njit(cache=True)
+def natgas_decision(gain_5d, boil_rsi, uco_rsi, uvxy_rsi, temp_change, severe_cold, is_winter):
+    """Scalar BOIL/KOLD decision tree.
+    
+    Returns (KOLD_TIERS row or -1, weather override, BOIL_ENTRY_CASES index,
+    UCO enhanced, supply shock). Strings are formatted by the caller.
+    """
+    # Common days first: a 5d gain under the lowest tier skips the tier scan,
+    # and RSI >= 50 rules out every BOIL entry case
+    kold_row = -1
+    if gain_5d >= _KOLD_MIN_GAIN[-1]:
+        for i in range(len(_KOLD_MIN_GAIN)):
+            if gain_5d >= _KOLD_MIN_GAIN[i] and boil_rsi > _KOLD_MIN_RSI[i]:
+                kold_row = i
+                break
+    weather_override = False
+    if kold_row >= 0 and _KOLD_ACTIVE[kold_row]:
+        weather_override = boil_rsi < 70 and severe_cold
+    
+    boil_case = 0
+    if not boil_rsi < 50:
+        pass
+    elif is_winter and temp_change < -10:
+        boil_case = 1
+    elif is_winter and boil_rsi < 35 and temp_change < -5:
+        boil_case = 2
+    elif boil_rsi < 21:
+        boil_case = 3
+    return kold_row, weather_override, boil_case, uco_rsi > 50, uvxy_rsi > 70 and uco_rsi > 60
+
+def neutral_boil_status():
+    """Default BOIL/KOLD status before any natgas signal is evaluated"""
+    return {
+        'signal': '⚪ NEUTRAL',
+        'action': 'No clear signal',
+        'price': None, 'rsi10': None,
+        'gain_5d': None, 'gain_7d': None,
+        'kold_tier': None, 'reasoning': [],
+    }
+
+# boil_metrics() results keyed by series_key(); check_signals reads them
+# for the weather prefetch and again in check_natgas_signals
+_BOIL_CACHE = {}
+
+def boil_metrics(boil_close):
+    """Latest BOIL price, RSI(10) and 5/7-day % gains"""
+    key = series_key(boil_close)
+    cached = _BOIL_CACHE.get(key)
+    if cached is None:
+        _BOIL_CACHE.clear()  # only the latest series is ever asked for twice
+        cached = _BOIL_CACHE[key] = _boil_metrics(boil_close)
+    return cached
+
+def _boil_metrics(boil_close):
+    boil = boil_close.to_numpy(dtype=np.float64)
+    boil_price = safe_float(boil[-1])
+    boil_rsi = safe_float(rsi_wilder_last(boil, 10))
+    
+    gain_5d = (boil_price / safe_float(boil[-6]) - 1) * 100 if boil.size >= 6 else 0
+    gain_7d = (boil_price / safe_float(boil[-8]) - 1) * 100 if boil.size >= 8 else 0
+    return boil_price, boil_rsi, gain_5d, gain_7d
+
+def weather_needed(gain_5d, boil_rsi, is_winter):
+    """Weather only matters for the KOLD override (ACTIVE tier, RSI<70) and
+    winter BOIL entries (RSI<50) — skip the HTTP round-trip otherwise"""
+    return (gain_5d >= 30 and boil_rsi < 70) or (is_winter and boil_rsi < 50)
+
+def check_natgas_signals(data, indicators, weather_future=None, is_winter=None):
     """
     BOIL/KOLD natural gas signal evaluation.
     
@@ -133,62 +589,54 @@ def check_natgas_signals(data, indicators):
     Supply Shock: UVXY RSI>70 + UCO RSI>60 → 73% win, +23.5% (n=11)
     BOIL ENTRY: Cold forecast + RSI<50 + winter months
     Weather Override: Blocks KOLD only when RSI<70 AND severe cold
+    
+    weather_future: pending get_weather_forecast() started by check_signals
+    Returned weather is None when the forecast was skipped, {} when it failed
+    is_winter: heating-season flag from check_signals (derived from today if None)
     """
     alerts = []
-    weather = get_weather_forecast()
-    
-    boil_status = {
-        'signal': '⚪ NEUTRAL',
-        'action': 'No clear signal',
-        'price': None, 'rsi10': None,
-        'gain_5d': None, 'gain_7d': None,
-        'kold_tier': None, 'reasoning': [],
-    }
+    weather = None
+    boil_status = neutral_boil_status()
     
     if 'BOIL' not in data or len(data['BOIL']) < 10:
         return alerts, boil_status, weather
     
-    boil_close = data['BOIL']['Close']
-    boil_price = safe_float(boil_close.iloc[-1])
-    boil_rsi = safe_float(calculate_rsi_wilder(boil_close, 10).iloc[-1])
-    
-    gain_5d = (boil_price / safe_float(boil_close.iloc[-6]) - 1) * 100 if len(boil_close) >= 6 else 0
-    gain_7d = (boil_price / safe_float(boil_close.iloc[-8]) - 1) * 100 if len(boil_close) >= 8 else 0
+    boil_price, boil_rsi, gain_5d, gain_7d = boil_metrics(data['BOIL']['Close'])
     
     boil_status.update({'price': boil_price, 'rsi10': boil_rsi,
                         'gain_5d': round(gain_5d, 1), 'gain_7d': round(gain_7d, 1)})
     
-    uco_rsi = indicators.get('UCO', {}).get('rsi10', 50)
-    uvxy_rsi = indicators.get('UVXY', {}).get('rsi10', 50)
-    usdu_rsi = indicators.get('USDU', {}).get('rsi10', 50)
-    uco_enhanced = uco_rsi > 50
-    supply_shock = uvxy_rsi > 70 and uco_rsi > 60
+    uco_rsi = indicators['UCO'].rsi10 if 'UCO' in indicators else 50
+    uvxy_rsi = indicators['UVXY'].rsi10 if 'UVXY' in indicators else 50
+    usdu_rsi = indicators['USDU'].rsi10 if 'USDU' in indicators else 50
     
-    now = datetime.now()
-    is_winter = now.month in [11, 12, 1, 2, 3]
-    temp_change = weather.get('temp_change_7d', 0)
-    severe_cold = weather.get('severe_cold', False)
+    if is_winter is None:
+        is_winter = datetime.now().month in WINTER_MONTHS
+    
+    if weather_future is not None:
+        try:
+            weather = weather_future.result(timeout=WEATHER_TIMEOUT)
+        except FutureTimeout:
+            print(f"Weather forecast timed out after {WEATHER_TIMEOUT}s")
+            weather = {}
+    elif weather_needed(gain_5d, boil_rsi, is_winter):
+        weather = get_weather_forecast()
+    forecast = weather or {}
+    temp_change = forecast.get('temp_change_7d', 0)
+    severe_cold = forecast.get('severe_cold', False)
+    
+    kold_row, weather_override, boil_case, uco_enhanced, supply_shock = natgas_decision(
+        float(gain_5d), float(boil_rsi), float(uco_rsi), float(uvxy_rsi),
+        float(temp_change), bool(severe_cold), bool(is_winter))
     
     reasoning = []
     kold_signal = None
     kold_tier = None
     
     # KOLD entry (fade BOIL spike)
-    if gain_5d >= 50:
-        kold_signal, kold_tier = 'ACTIVE', 'TIER 1'
-        reasoning.append(f'BOIL 5d gain {gain_5d:+.1f}% >= 50% → 100% win, +25.4% avg (n=7)')
-    elif gain_5d >= 40:
-        kold_signal, kold_tier = 'ACTIVE', 'TIER 1'
-        reasoning.append(f'BOIL 5d gain {gain_5d:+.1f}% >= 40% → 89% win, +18.5% avg (n=9)')
-    elif gain_5d >= 30 and boil_rsi > 70:
-        kold_signal, kold_tier = 'ACTIVE', 'TIER 2'
-        reasoning.append(f'BOIL 5d gain {gain_5d:+.1f}% >= 30% + RSI {boil_rsi:.1f} > 70 → 92% win (n=12)')
-    elif gain_5d >= 30:
-        kold_signal, kold_tier = 'ACTIVE', 'TIER 2'
-        reasoning.append(f'BOIL 5d gain {gain_5d:+.1f}% >= 30% → 88% win, +14.5% avg (n=24)')
-    elif gain_5d >= 20:
-        kold_signal, kold_tier = 'WATCH', 'TIER 3'
-        reasoning.append(f'BOIL 5d gain {gain_5d:+.1f}% >= 20% → 66% win (n=76), partial position')
+    if kold_row >= 0:
+        _, _, kold_signal, kold_tier, why = KOLD_TIERS[kold_row]
+        reasoning.append(why.format(gain_5d=gain_5d, boil_rsi=boil_rsi))
     
     if kold_signal:
         if uco_enhanced:
@@ -198,21 +646,13 @@ def check_natgas_signals(data, indicators):
     if supply_shock:
         reasoning.append(f'⚠️ Supply Shock: UVXY {uvxy_rsi:.1f} > 70 + UCO {uco_rsi:.1f} > 60')
     
-    weather_override = kold_signal == 'ACTIVE' and boil_rsi < 70 and severe_cold
     if weather_override:
         reasoning.append('⚠️ WEATHER OVERRIDE: RSI < 70 + severe cold → wait')
     
     # BOIL entry (long)
-    boil_entry = None
-    if is_winter and boil_rsi < 50 and temp_change < -10:
-        boil_entry = 'ACTIVE'
-        reasoning.append(f'BUY BOIL: Winter + RSI {boil_rsi:.1f} < 50 + cold {temp_change:+.1f}°F')
-    elif is_winter and boil_rsi < 35 and temp_change < -5:
-        boil_entry = 'WATCH'
-        reasoning.append(f'Watch BOIL: RSI {boil_rsi:.1f} < 35 + cooling {temp_change:+.1f}°F')
-    elif boil_rsi < 21:
-        boil_entry = 'WATCH'
-        reasoning.append(f'BOIL RSI {boil_rsi:.1f} < 21 → extreme oversold')
+    boil_entry, why = BOIL_ENTRY_CASES[boil_case]
+    if boil_entry:
+        reasoning.append(why.format(boil_rsi=boil_rsi, temp_change=temp_change))
     
     boil_status['reasoning'] = reasoning
     boil_status['kold_tier'] = kold_tier
@@ -249,63 +689,109 @@ def check_natgas_signals(data, indicators):
 # =============================================================================
 # SIGNAL CHECKS
 # =============================================================================
+# Single-ticker RSI(10) ladders: ticker → ladders, each a first-match list of
+# (above, threshold, title, message template, alert type). Every ladder of a
+# ticker is checked, in order, so a ticker can fire one buy and one exit row
+RSI_LADDERS = {
+    # UPRO entry/exit
+    'SPY': (
+        ((True, 85, '🔴 UPRO EXIT', "SPY RSI={rsi:.1f} > 85 → Trim/Exit UPRO: Only 36% win, -3.5% avg (5d)", 'exit'),
+         (True, 82, '🟡 UPRO CAUTION', "SPY RSI={rsi:.1f} > 82 → Watch UPRO: 49% win at 5d", 'warning')),
+        ((False, 21, '🟢 UPRO STRONG BUY', "SPY RSI={rsi:.1f} < 21 → Add UPRO: 94% win, +8.9% avg (5d)", 'buy'),
+         (False, 25, '🟢 UPRO BUY', "SPY RSI={rsi:.1f} < 25 → Add UPRO: 74% win, +3.9% avg (5d)", 'buy'),
+         (False, 30, '🟢 UPRO CONSIDER', "SPY RSI={rsi:.1f} < 30 → Consider UPRO: 69% win, +4.3% avg (5d)", 'buy')),
+    ),
+    'AMD': (
+        ((True, 85, '🟡 AMD EXTENDED', "AMD RSI={rsi:.1f} > 85 → Consider taking profits", 'warning'),),
+    ),
+    'NVDA': (
+        ((True, 85, '🟡 NVDA EXTENDED', "NVDA RSI={rsi:.1f} > 85 → Consider taking profits", 'warning'),),
+    ),
+    'CURE': (
+        ((False, 21, '🟢 CURE STRONG BUY', "CURE RSI={rsi:.1f} < 21 → Buy CURE: 85% win, +7.3% avg (5d) | n=33", 'buy'),
+         (False, 25, '🟢 CURE BUY', "CURE RSI={rsi:.1f} < 25 → Buy CURE: 81% win, +5.4% avg (5d) | n=70", 'buy')),
+        ((True, 85, '🔴 CURE SELL', "CURE RSI={rsi:.1f} > 85 → Sell CURE: Only 33% win (5d) | n=15", 'exit'),
+         (True, 79, '🔴 CURE OVERBOUGHT', "CURE RSI={rsi:.1f} > 79 → Exit CURE: Only 40% win (5d) | n=95", 'exit')),
+    ),
+    'FAS': (
+        ((False, 30, '🟢 FAS BUY', "FAS RSI={rsi:.1f} < 30 → Buy FAS: 63% win, +3.3% avg (5d) | n=195", 'buy'),),
+        ((True, 85, '🔴 FAS SELL', "FAS RSI={rsi:.1f} > 85 → Sell FAS: Only 8% win! (5d) | n=12", 'exit'),
+         (True, 82, '🔴 FAS OVERBOUGHT', "FAS RSI={rsi:.1f} > 82 → Exit FAS: Only 38% win (5d) | n=40", 'exit')),
+    ),
+    'LABU': (
+        ((False, 21, '🟢 LABU STRONG BUY', "LABU RSI={rsi:.1f} < 21 → Buy LABU: 73% win, +11.2% avg (5d) | n=11", 'buy'),
+         (False, 25, '🟢 LABU BUY', "LABU RSI={rsi:.1f} < 25 → Buy LABU: 66% win, +5.7% avg (5d) | n=59", 'buy')),
+        ((True, 70, '🟡 LABU EXTENDED', "LABU RSI={rsi:.1f} > 70 → Caution: 42% win (5d) | n=180", 'warning'),),
+    ),
+}
+
+def rsi_ladder_alerts(ticker, rsi_val):
+    """Alerts from the RSI_LADDERS rows of one ticker (first match per ladder)"""
+    alerts = []
+    for ladder in RSI_LADDERS[ticker]:
+        for above, threshold, title, template, kind in ladder:
+            if (rsi_val > threshold) if above else (rsi_val < threshold):
+                alerts.append((title, template.format(rsi=rsi_val), kind))
+                break
+    return alerts
+
 def check_signals(data):
     """Check all signals and return alerts"""
     alerts = []
     status = {}
     
-    # Calculate indicators for all tickers
-    indicators = {}
-    for ticker, df in data.items():
-        if len(df) < 200:
-            continue
-        
+    is_winter = datetime.now().month in WINTER_MONTHS
+    
+    # Start the forecast request now so its latency overlaps the indicator pass
+    weather_future = None
+    if 'BOIL' in data and len(data['BOIL']) >= 10:
+        _, boil_rsi, gain_5d, _ = boil_metrics(data['BOIL']['Close'])
+        if weather_needed(gain_5d, boil_rsi, is_winter):
+            weather_future = _EXECUTOR.submit(get_weather_forecast)
+    
+    # Calculate indicators for every ticker with enough history for SMA(200).
+    # `data` itself stays whole — BOIL and the bond-momentum check need fewer bars
+    closes = {t: df['Close'] for t, df in data.items() if len(df) >= 200}
+    # Reuse previous results while a series is unchanged; the rest go
+    # through the batched kernel together
+    keys = {t: series_key(close) for t, close in closes.items()}
+    stale = {t: close for t, close in closes.items()
+             if _INDICATOR_CACHE.get(t, (None,))[0] != keys[t]}
+    if stale:
         try:
-            close = df['Close']
-            
-            # Get latest values as scalars
-            price = safe_float(close.iloc[-1])
-            rsi10 = safe_float(calculate_rsi_wilder(close, 10).iloc[-1])
-            rsi50 = safe_float(calculate_rsi_wilder(close, 50).iloc[-1])
-            sma200 = safe_float(close.rolling(window=200).mean().iloc[-1])
-            sma50 = safe_float(close.rolling(window=50).mean().iloc[-1])
-            
-            # EMAs — 9, 20, 50, 200
-            ema9 = safe_float(close.ewm(span=9, adjust=False).mean().iloc[-1])
-            ema20 = safe_float(close.ewm(span=20, adjust=False).mean().iloc[-1])
-            ema50 = safe_float(close.ewm(span=50, adjust=False).mean().iloc[-1])
-            ema200 = safe_float(close.ewm(span=200, adjust=False).mean().iloc[-1])
-            
-            indicators[ticker] = {
-                'price': price,
-                'rsi10': rsi10,
-                'rsi50': rsi50,
-                'sma200': sma200,
-                'sma50': sma50,
-                'ema9': ema9,
-                'ema20': ema20,
-                'ema50': ema50,
-                'ema200': ema200,
-            }
-            
-            # Calculate % above SMA200
-            if sma200 > 0:
-                indicators[ticker]['pct_above_sma200'] = (price / sma200 - 1) * 100
-            else:
-                indicators[ticker]['pct_above_sma200'] = 0
-
-            # EMA trend flags
-            indicators[ticker]['above_ema9'] = price > ema9
-            indicators[ticker]['above_ema20'] = price > ema20
-            indicators[ticker]['above_ema50'] = price > ema50
-            indicators[ticker]['above_ema200'] = price > ema200
-                
+            fresh = compute_indicators_batch(stale)
         except Exception as e:
-            print(f"Error calculating indicators for {ticker}: {e}")
-            continue
+            print(f"Error in batched indicator pass, falling back per ticker: {e}")
+            fresh = {}
+            for ticker, close in stale.items():
+                try:
+                    fresh[ticker] = compute_indicators(close)
+                except Exception as e:
+                    print(f"Error calculating indicators for {ticker}: {e}")
+        for ticker, ind in fresh.items():
+            _INDICATOR_CACHE[ticker] = (keys[ticker], ind)
+    indicators = {t: _INDICATOR_CACHE[t][1] for t in closes
+                  if _INDICATOR_CACHE.get(t, (None,))[0] == keys[t]}
     
     status['indicators'] = indicators
     
+    # Nothing to evaluate (empty/malformed download) — skip every signal group
+    if not indicators:
+        if weather_future is not None:
+            weather_future.cancel()
+        status.update({'bond_momentum': {}, 'boil_status': neutral_boil_status(), 'weather': None})
+        return alerts, status
+    
+    # RSI(10) > 79 is the shared overbought cutoff — evaluate it for every
+    # ticker in one vectorized comparison for the cross-ticker checks below
+    rsi10_all = np.fromiter((ind.rsi10 for ind in indicators.values()),
+                            dtype=np.float64, count=len(indicators))
+    overbought = {t for t, ob in zip(indicators, (rsi10_all > 79).tolist()) if ob}
+    # RSI(10) by ticker as plain floats for the single-ticker checks below
+    rsi = dict(zip(indicators, rsi10_all.tolist()))
+    # GLD > 79 with USDU < 25 gates the double signal and the NAIL/FAS combos
+    gld_usdu_double = 'GLD' in overbought and rsi.get('USDU', np.inf) < 25
+    
     # =========================================================================
     # BOND MOMENTUM INDICATOR
     # =========================================================================
@@ -313,8 +799,8 @@ def check_signals(data):
     bond_mom_detail = {}
     if 'TLT' in data and len(data['TLT']) >= 15:
         try:
-            tlt_close = data['TLT']['Close']
-            tlt_ret10 = safe_float((tlt_close.iloc[-1] / tlt_close.iloc[-11] - 1))
+            tlt_close = data['TLT']['Close'].to_numpy(dtype=np.float64)
+            tlt_ret10 = safe_float(tlt_close[-1] / tlt_close[-11] - 1)
             bonds_rising = tlt_ret10 > 0
             bond_momentum = bonds_rising
             bond_mom_detail = {
@@ -324,8 +810,8 @@ def check_signals(data):
             }
             # Also get BND if available
             if 'BND' in data and len(data['BND']) >= 15:
-                bnd_close = data['BND']['Close']
-                bnd_ret10 = safe_float((bnd_close.iloc[-1] / bnd_close.iloc[-11] - 1))
+                bnd_close = data['BND']['Close'].to_numpy(dtype=np.float64)
+                bnd_ret10 = safe_float(bnd_close[-1] / bnd_close[-11] - 1)
                 bond_mom_detail['bnd_ret10'] = bnd_ret10 * 100
         except Exception as e:
             print(f"Error calculating bond momentum: {e}")
@@ -339,39 +825,37 @@ def check_signals(data):
         smh = indicators['SMH']
         
         # EXIT Signals
-        if smh['pct_above_sma200'] >= 40:
-            alerts.append(('🔴 SOXL EXIT', f"SMH {smh['pct_above_sma200']:.1f}% above SMA(200) - SELL SOXL", 'exit'))
-        elif smh['pct_above_sma200'] >= 35:
-            alerts.append(('🟡 SOXL WARNING', f"SMH {smh['pct_above_sma200']:.1f}% above SMA(200) - Approaching sell zone", 'warning'))
-        elif smh['pct_above_sma200'] >= 30:
-            alerts.append(('🟡 SOXL TRIM', f"SMH {smh['pct_above_sma200']:.1f}% above SMA(200) - Consider trimming 25-50%", 'warning'))
+        if smh.pct_above_sma200 >= 40:
+            alerts.append(('🔴 SOXL EXIT', f"SMH {smh.pct_above_sma200:.1f}% above SMA(200) - SELL SOXL", 'exit'))
+        elif smh.pct_above_sma200 >= 35:
+            alerts.append(('🟡 SOXL WARNING', f"SMH {smh.pct_above_sma200:.1f}% above SMA(200) - Approaching sell zone", 'warning'))
+        elif smh.pct_above_sma200 >= 30:
+            alerts.append(('🟡 SOXL TRIM', f"SMH {smh.pct_above_sma200:.1f}% above SMA(200) - Consider trimming 25-50%", 'warning'))
         
         # Death Cross
-        if smh['sma50'] < smh['sma200'] and smh['sma200'] > 0:
+        if smh.sma50 < smh.sma200 and smh.sma200 > 0:
             alerts.append(('🔴 DEATH CROSS', f"SMH SMA(50) below SMA(200) - Bearish trend", 'exit'))
         
         # BUY Signals - Days below SMA200
         if 'SMH' in data:
             smh_df = data['SMH']
             close = smh_df['Close']
-            sma200_series = close.rolling(window=200).mean()
             
-            # Count consecutive days below
-            days_below = 0
-            for i in range(len(close)-1, max(len(close)-500, 199), -1):
-                try:
-                    c = safe_float(close.iloc[i])
-                    s = safe_float(sma200_series.iloc[i])
-                    if s > 0 and c < s:
-                        days_below += 1
-                    else:
-                        break
-                except:
-                    break
+            # Count consecutive days below — trailing run of one vectorized
+            # compare over the last 500 bars (first 199 have no SMA). The
+            # rolling mean only needs those bars plus 199 bars of lead-in
+            start = max(len(close) - 500, 199) + 1
+            tail = close.iloc[start - 199:]
+            c = np.nan_to_num(close.to_numpy(dtype=np.float64)[start:], nan=0.0)
+            s = tail.rolling(window=200).mean().to_numpy(dtype=np.float64)[199:]
+            with np.errstate(invalid='ignore'):
+                below = (s > 0) & (c < s)
+            breaks = np.flatnonzero(~below[::-1])
+            days_below = int(breaks[0]) if breaks.size else below.size
             
             if days_below >= 100:
-                if smh['rsi50'] < 45:
-                    alerts.append(('🟢 SOXL STRONG BUY', f"SMH {days_below} days below SMA(200) + RSI(50)={smh['rsi50']:.1f} < 45 | 97% win, +81% avg", 'buy'))
+                if smh.rsi50 < 45:
+                    alerts.append(('🟢 SOXL STRONG BUY', f"SMH {days_below} days below SMA(200) + RSI(50)={smh.rsi50:.1f} < 45 | 97% win, +81% avg", 'buy'))
                 else:
                     alerts.append(('🟢 SOXL ACCUMULATE', f"SMH {days_below} days below SMA(200) | 85% win, +54% avg", 'buy'))
             
@@ -381,41 +865,37 @@ def check_signals(data):
     # SIGNAL GROUP 2: GLD/USDU Combo Signals
     # =========================================================================
     if 'GLD' in indicators and 'USDU' in indicators:
-        gld = indicators['GLD']
-        usdu = indicators['USDU']
+        gld_rsi = rsi['GLD']
+        usdu_rsi = rsi['USDU']
         
         # Double Signal: GLD > 79 AND USDU < 25
-        if gld['rsi10'] > 79 and usdu['rsi10'] < 25:
+        if gld_usdu_double:
             alerts.append(('🟢🔥 DOUBLE SIGNAL ACTIVE', 
-                f"GLD RSI={gld['rsi10']:.1f} > 79 AND USDU RSI={usdu['rsi10']:.1f} < 25\n"
+                f"GLD RSI={gld_rsi:.1f} > 79 AND USDU RSI={usdu_rsi:.1f} < 25\n"
                 f"   → Long TQQQ: 88% win, +7% avg (5d)\n"
                 f"   → Long UPRO: 85% win, +5.2% avg (5d)\n"
                 f"   → AMD/NVDA: 86% win, +5-8% avg (5d)", 'buy'))
             
             # Triple Signal: Add XLP > 65
-            if 'XLP' in indicators and indicators['XLP']['rsi10'] > 65:
-                xlp = indicators['XLP']
+            xlp_rsi = rsi.get('XLP', 0.0)
+            if xlp_rsi > 65:
                 alerts.append(('🟢🔥🔥 TRIPLE SIGNAL ACTIVE', 
-                    f"GLD RSI={gld['rsi10']:.1f} + USDU RSI={usdu['rsi10']:.1f} + XLP RSI={xlp['rsi10']:.1f}\n"
+                    f"GLD RSI={gld_rsi:.1f} + USDU RSI={usdu_rsi:.1f} + XLP RSI={xlp_rsi:.1f}\n"
                     f"   → Long TQQQ: 100% win, +11.6% avg (5d) - RARE!", 'buy'))
         
         # Individual GLD overbought
-        elif gld['rsi10'] > 79:
+        elif gld_rsi > 79:
             alerts.append(('🟢 GLD OVERBOUGHT', 
-                f"GLD RSI={gld['rsi10']:.1f} > 79 → Long TQQQ: 72% win, +3.2% avg (5d)", 'buy'))
+                f"GLD RSI={gld_rsi:.1f} > 79 → Long TQQQ: 72% win, +3.2% avg (5d)", 'buy'))
     
     # =========================================================================
     # SIGNAL GROUP 3: Defensive Rotation
     # =========================================================================
-    defensive_ob = False
-    for ticker in ['XLP', 'XLU', 'XLV']:
-        if ticker in indicators and indicators[ticker]['rsi10'] > 79:
-            defensive_ob = True
-            break
+    defensive_ob = not overbought.isdisjoint(('XLP', 'XLU', 'XLV'))
     
     if defensive_ob:
-        spy_ob = 'SPY' in indicators and indicators['SPY']['rsi10'] > 79
-        qqq_ob = 'QQQ' in indicators and indicators['QQQ']['rsi10'] > 79
+        spy_ob = 'SPY' in overbought
+        qqq_ob = 'QQQ' in overbought
         
         if not spy_ob and not qqq_ob:
             alerts.append(('🟢 DEFENSIVE ROTATION', 
@@ -425,9 +905,9 @@ def check_signals(data):
     # SIGNAL GROUP 4: Volatility Hedge Signals (with Bond Momentum Conviction)
     # =========================================================================
     if 'QQQ' in indicators:
-        qqq = indicators['QQQ']
+        qqq_rsi = rsi['QQQ']
         
-        if qqq['rsi10'] > 79:
+        if qqq_rsi > 79:
             # Add bond momentum conviction
             bm_note = ""
             if bond_momentum is not None:
@@ -437,19 +917,19 @@ def check_signals(data):
                     bm_note = " | ⚠️ Bonds rising = moderate conviction"
             
             alerts.append(('🟡 VOL HEDGE', 
-                f"QQQ RSI={qqq['rsi10']:.1f} > 79 → Long UVXY 5d: 67% win, +33% CAGR{bm_note}", 'hedge'))
+                f"QQQ RSI={qqq_rsi:.1f} > 79 → Long UVXY 5d: 67% win, +33% CAGR{bm_note}", 'hedge'))
         
-        if qqq['rsi10'] < 20:
+        if qqq_rsi < 20:
             alerts.append(('🟢 QQQ DIP BUY', 
-                f"QQQ RSI={qqq['rsi10']:.1f} < 20 → Long TQQQ 5d: 69% win, +26% CAGR", 'buy'))
+                f"QQQ RSI={qqq_rsi:.1f} < 20 → Long TQQQ 5d: 69% win, +26% CAGR", 'buy'))
     
     # =========================================================================
     # SIGNAL GROUP 4b: SPY Overbought UVXY (with Bond Momentum)
     # =========================================================================
     if 'SPY' in indicators:
-        spy = indicators['SPY']
+        spy_rsi = rsi['SPY']
         
-        if spy['rsi10'] > 79:
+        if spy_rsi > 79:
             bm_note = ""
             if bond_momentum is not None:
                 if not bond_momentum:
@@ -458,183 +938,126 @@ def check_signals(data):
                     bm_note = "\n   ⚠️ Bonds rising: 50% win, +1.9% avg (moderate conviction)"
             
             # Dual overbought
-            qqq_ob = 'QQQ' in indicators and indicators['QQQ']['rsi10'] > 79
+            qqq_ob = 'QQQ' in overbought
             if qqq_ob:
                 alerts.append(('🟡 DUAL OVERBOUGHT → UVXY', 
-                    f"SPY RSI={spy['rsi10']:.1f} + QQQ RSI={indicators['QQQ']['rsi10']:.1f} > 79 → UVXY 5d: 76% win, +9.0%{bm_note}", 'hedge'))
+                    f"SPY RSI={spy_rsi:.1f} + QQQ RSI={rsi['QQQ']:.1f} > 79 → UVXY 5d: 76% win, +9.0%{bm_note}", 'hedge'))
             else:
                 alerts.append(('🟡 SPY OVERBOUGHT → UVXY', 
-                    f"SPY RSI={spy['rsi10']:.1f} > 79 → UVXY 5d: 64% win, +5.9%{bm_note}", 'hedge'))
+                    f"SPY RSI={spy_rsi:.1f} > 79 → UVXY 5d: 64% win, +5.9%{bm_note}", 'hedge'))
     
     # =========================================================================
     # SIGNAL GROUP 5: SOXS Short Signals
     # =========================================================================
     if 'SMH' in indicators and 'USDU' in indicators:
-        smh = indicators['SMH']
-        usdu = indicators['USDU']
+        smh_rsi = rsi['SMH']
+        usdu_rsi = rsi['USDU']
         
-        if smh['rsi10'] > 79 and usdu['rsi10'] > 70:
+        if smh_rsi > 79 and usdu_rsi > 70:
             alerts.append(('🔴 SOXS SIGNAL', 
-                f"SMH RSI={smh['rsi10']:.1f} > 79 AND USDU RSI={usdu['rsi10']:.1f} > 70\n"
+                f"SMH RSI={smh_rsi:.1f} > 79 AND USDU RSI={usdu_rsi:.1f} > 70\n"
                 f"   → Long SOXS 5d: 100% win, +9.5% avg", 'short'))
         
-        if 'IWM' in indicators and smh['rsi10'] > 79 and indicators['IWM']['rsi10'] < 50:
+        if 'IWM' in indicators and smh_rsi > 79 and rsi['IWM'] < 50:
             alerts.append(('🔴 SOXS DIVERGENCE', 
-                f"SMH RSI={smh['rsi10']:.1f} > 79 AND IWM RSI={indicators['IWM']['rsi10']:.1f} < 50\n"
+                f"SMH RSI={smh_rsi:.1f} > 79 AND IWM RSI={rsi['IWM']:.1f} < 50\n"
                 f"   → Long SOXS 5d: 86% win, +6.9% avg", 'short'))
     
     # =========================================================================
     # SIGNAL GROUP 6: BTC Signals
     # =========================================================================
     if 'BTC-USD' in indicators:
-        btc = indicators['BTC-USD']
+        btc_rsi = rsi['BTC-USD']
         
-        if btc['rsi10'] > 79:
+        if btc_rsi > 79:
             alerts.append(('🟢 BTC MOMENTUM', 
-                f"BTC RSI={btc['rsi10']:.1f} > 79 → Hold/Add BTC: 67% win, +5.2% avg (5d)", 'buy'))
+                f"BTC RSI={btc_rsi:.1f} > 79 → Hold/Add BTC: 67% win, +5.2% avg (5d)", 'buy'))
         
-        if btc['rsi10'] < 30:
-            uvxy_low = 'UVXY' in indicators and indicators['UVXY']['rsi10'] < 40
+        if btc_rsi < 30:
+            uvxy_low = 'UVXY' in indicators and rsi['UVXY'] < 40
             if uvxy_low:
                 alerts.append(('🟢 BTC DIP BUY', 
-                    f"BTC RSI={btc['rsi10']:.1f} < 30 AND UVXY < 40 → Buy BTC: 77% win, +4.1% avg (5d)", 'buy'))
+                    f"BTC RSI={btc_rsi:.1f} < 30 AND UVXY < 40 → Buy BTC: 77% win, +4.1% avg (5d)", 'buy'))
             else:
                 alerts.append(('🟡 BTC OVERSOLD', 
-                    f"BTC RSI={btc['rsi10']:.1f} < 30 (wait for UVXY < 40 for better signal)", 'watch'))
+                    f"BTC RSI={btc_rsi:.1f} < 30 (wait for UVXY < 40 for better signal)", 'watch'))
     
     # =========================================================================
     # SIGNAL GROUP 7: UPRO Entry/Exit Signals
     # =========================================================================
     if 'SPY' in indicators:
-        spy = indicators['SPY']
-        
-        if spy['rsi10'] > 85:
-            alerts.append(('🔴 UPRO EXIT', 
-                f"SPY RSI={spy['rsi10']:.1f} > 85 → Trim/Exit UPRO: Only 36% win, -3.5% avg (5d)", 'exit'))
-        elif spy['rsi10'] > 82:
-            alerts.append(('🟡 UPRO CAUTION', 
-                f"SPY RSI={spy['rsi10']:.1f} > 82 → Watch UPRO: 49% win at 5d", 'warning'))
-        
-        if spy['rsi10'] < 21:
-            alerts.append(('🟢 UPRO STRONG BUY', 
-                f"SPY RSI={spy['rsi10']:.1f} < 21 → Add UPRO: 94% win, +8.9% avg (5d)", 'buy'))
-        elif spy['rsi10'] < 25:
-            alerts.append(('🟢 UPRO BUY', 
-                f"SPY RSI={spy['rsi10']:.1f} < 25 → Add UPRO: 74% win, +3.9% avg (5d)", 'buy'))
-        elif spy['rsi10'] < 30:
-            alerts.append(('🟢 UPRO CONSIDER', 
-                f"SPY RSI={spy['rsi10']:.1f} < 30 → Consider UPRO: 69% win, +4.3% avg (5d)", 'buy'))
+        alerts.extend(rsi_ladder_alerts('SPY', rsi['SPY']))
     
     # =========================================================================
     # SIGNAL GROUP 8: AMD/NVDA Specific
     # =========================================================================
-    if 'AMD' in indicators:
-        amd = indicators['AMD']
-        if amd['rsi10'] > 85:
-            alerts.append(('🟡 AMD EXTENDED', 
-                f"AMD RSI={amd['rsi10']:.1f} > 85 → Consider taking profits", 'warning'))
-    
-    if 'NVDA' in indicators:
-        nvda = indicators['NVDA']
-        if nvda['rsi10'] > 85:
-            alerts.append(('🟡 NVDA EXTENDED', 
-                f"NVDA RSI={nvda['rsi10']:.1f} > 85 → Consider taking profits", 'warning'))
+    for ticker in ('AMD', 'NVDA'):
+        if ticker in indicators:
+            alerts.extend(rsi_ladder_alerts(ticker, rsi[ticker]))
     
     # =========================================================================
     # SIGNAL GROUP 9: NAIL (3x Homebuilders) Signals
     # =========================================================================
     if 'NAIL' in indicators:
-        nail = indicators['NAIL']
+        nail_rsi = rsi['NAIL']
         
         if 'GLD' in indicators and 'USDU' in indicators and 'XLF' in indicators:
-            gld = indicators['GLD']
-            usdu = indicators['USDU']
-            xlf = indicators['XLF']
+            gld_rsi = rsi['GLD']
+            usdu_rsi = rsi['USDU']
+            xlf_rsi = rsi['XLF']
             
-            if gld['rsi10'] > 79 and usdu['rsi10'] < 25 and xlf['rsi10'] < 70:
+            if gld_usdu_double and xlf_rsi < 70:
                 alerts.append(('🟢 NAIL SIGNAL', 
-                    f"GLD>{gld['rsi10']:.0f} + USDU<{usdu['rsi10']:.0f} + XLF<{xlf['rsi10']:.0f}\n"
+                    f"GLD>{gld_rsi:.0f} + USDU<{usdu_rsi:.0f} + XLF<{xlf_rsi:.0f}\n"
                     f"   → Long NAIL: 90% win, +4.9% avg (5d), +14.4% avg (10d) | n=10", 'buy'))
             
-            if xlf['rsi10'] > 70 and usdu['rsi10'] < 25:
+            if xlf_rsi > 70 and usdu_rsi < 25:
                 alerts.append(('🔴 NAIL DANGER', 
-                    f"XLF RSI={xlf['rsi10']:.1f} > 70 + USDU < 25 = Historically BAD for NAIL\n"
+                    f"XLF RSI={xlf_rsi:.1f} > 70 + USDU < 25 = Historically BAD for NAIL\n"
                     f"   → 11% win, -11.5% avg (5d) | Consider exit", 'exit'))
         
-        if nail['rsi10'] > 79:
+        if nail_rsi > 79:
             alerts.append(('🔴 NAIL OVERBOUGHT', 
-                f"NAIL RSI={nail['rsi10']:.1f} > 79 → Consider exit", 'warning'))
+                f"NAIL RSI={nail_rsi:.1f} > 79 → Consider exit", 'warning'))
     
     # =========================================================================
     # SIGNAL GROUP 10: CURE (3x Healthcare) Signals
     # =========================================================================
     if 'CURE' in indicators:
-        cure = indicators['CURE']
-        
-        if cure['rsi10'] < 21:
-            alerts.append(('🟢 CURE STRONG BUY', 
-                f"CURE RSI={cure['rsi10']:.1f} < 21 → Buy CURE: 85% win, +7.3% avg (5d) | n=33", 'buy'))
-        elif cure['rsi10'] < 25:
-            alerts.append(('🟢 CURE BUY', 
-                f"CURE RSI={cure['rsi10']:.1f} < 25 → Buy CURE: 81% win, +5.4% avg (5d) | n=70", 'buy'))
-        
-        if cure['rsi10'] > 85:
-            alerts.append(('🔴 CURE SELL', 
-                f"CURE RSI={cure['rsi10']:.1f} > 85 → Sell CURE: Only 33% win (5d) | n=15", 'exit'))
-        elif cure['rsi10'] > 79:
-            alerts.append(('🔴 CURE OVERBOUGHT', 
-                f"CURE RSI={cure['rsi10']:.1f} > 79 → Exit CURE: Only 40% win (5d) | n=95", 'exit'))
+        alerts.extend(rsi_ladder_alerts('CURE', rsi['CURE']))
     
     # =========================================================================
     # SIGNAL GROUP 11: FAS (3x Financials) Signals
     # =========================================================================
     if 'FAS' in indicators:
-        fas = indicators['FAS']
-        
         if 'GLD' in indicators and 'USDU' in indicators:
-            gld = indicators['GLD']
-            usdu = indicators['USDU']
+            gld_rsi = rsi['GLD']
+            usdu_rsi = rsi['USDU']
             
-            if gld['rsi10'] > 79 and usdu['rsi10'] < 25:
+            if gld_usdu_double:
                 alerts.append(('🟢 FAS SIGNAL', 
-                    f"GLD>{gld['rsi10']:.0f} + USDU<{usdu['rsi10']:.0f}\n"
+                    f"GLD>{gld_rsi:.0f} + USDU<{usdu_rsi:.0f}\n"
                     f"   → Long FAS 10d: 92% win, +5.8% avg | n=13", 'buy'))
         
-        if fas['rsi10'] < 30:
-            alerts.append(('🟢 FAS BUY', 
-                f"FAS RSI={fas['rsi10']:.1f} < 30 → Buy FAS: 63% win, +3.3% avg (5d) | n=195", 'buy'))
-        
-        if fas['rsi10'] > 85:
-            alerts.append(('🔴 FAS SELL', 
-                f"FAS RSI={fas['rsi10']:.1f} > 85 → Sell FAS: Only 8% win! (5d) | n=12", 'exit'))
-        elif fas['rsi10'] > 82:
-            alerts.append(('🔴 FAS OVERBOUGHT', 
-                f"FAS RSI={fas['rsi10']:.1f} > 82 → Exit FAS: Only 38% win (5d) | n=40", 'exit'))
+        alerts.extend(rsi_ladder_alerts('FAS', rsi['FAS']))
     
     # =========================================================================
     # SIGNAL GROUP 12: LABU (3x Biotech) Signals
     # =========================================================================
     if 'LABU' in indicators:
         labu = indicators['LABU']
+        alerts.extend(rsi_ladder_alerts('LABU', rsi['LABU']))
         
-        if labu['rsi10'] < 21:
-            alerts.append(('🟢 LABU STRONG BUY', 
-                f"LABU RSI={labu['rsi10']:.1f} < 21 → Buy LABU: 73% win, +11.2% avg (5d) | n=11", 'buy'))
-        elif labu['rsi10'] < 25:
-            alerts.append(('🟢 LABU BUY', 
-                f"LABU RSI={labu['rsi10']:.1f} < 25 → Buy LABU: 66% win, +5.7% avg (5d) | n=59", 'buy'))
-        
-        if labu['rsi10'] > 70:
-            alerts.append(('🟡 LABU EXTENDED', 
-                f"LABU RSI={labu['rsi10']:.1f} > 70 → Caution: 42% win (5d) | n=180", 'warning'))
-        
-        if labu.get('pct_above_sma200', 0) > 80:
+        if labu.pct_above_sma200 > 80:
             alerts.append(('🟡 LABU EXTREME', 
-                f"LABU {labu['pct_above_sma200']:.0f}% above SMA(200) → Very extended, consider profits", 'warning'))
+                f"LABU {labu.pct_above_sma200:.0f}% above SMA(200) → Very extended, consider profits", 'warning'))
     
     # SIGNAL GROUP: BOIL/KOLD Natural Gas
-    natgas_alerts, boil_status, weather = check_natgas_signals(data, indicators)
-    alerts.extend(natgas_alerts)
+    if 'BOIL' in data:
+        natgas_alerts, boil_status, weather = check_natgas_signals(data, indicators, weather_future, is_winter)
+        alerts.extend(natgas_alerts)
+    else:
+        boil_status, weather = neutral_boil_status(), None
     status['boil_status'] = boil_status
     status['weather'] = weather
     
@@ -643,39 +1066,224 @@ def check_signals(data):
 # =============================================================================
 # EMAIL FUNCTIONS
 # =============================================================================
-def format_ema_line(ind, price):
+# Compact trend arrows for every 4-bit EMA mask (bit 0 = EMA9 ... bit 3 = EMA200)
+_EMA_STRINGS = tuple(
+    ' '.join(f"{span}{'↑' if mask >> bit & 1 else '↓'}"
+             for bit, span in enumerate((9, 20, 50, 200)))
+    for mask in range(16)
+)
+
+def format_ema_line(ind):
     """Format EMA status as compact trend arrows"""
-    e9 = ind.get('ema9', 0)
-    e20 = ind.get('ema20', 0)
-    e50 = ind.get('ema50', 0)
-    e200 = ind.get('ema200', 0)
-    
-    # Trend stack: price vs each EMA
-    flags = []
-    if price > e9: flags.append('9↑')
-    else: flags.append('9↓')
-    if price > e20: flags.append('20↑')
-    else: flags.append('20↓')
-    if price > e50: flags.append('50↑')
-    else: flags.append('50↓')
-    if price > e200: flags.append('200↑')
-    else: flags.append('200↓')
-    
-    return ' '.join(flags)
-
-def format_email(alerts, status, is_preclose=False):
-    """Format the email body"""
+    return _EMA_STRINGS[ind.ema_mask]
+
+# Playbook proximity section; filled from the ctx dict built in format_email
+PLAYBOOK_TEMPLATE = """
+{sep}
+PLAYBOOK STATUS — Signal Proximity
+{sep}
+
+COMBO SIGNALS
+{sub}
+  Triple Signal ({triple_met}/3 conditions):
+    GLD RSI > 79:    {gld:>5.1f}  {gld_bar79}
+    USDU RSI < 25:   {usdu:>5.1f}  {usdu_bar25}
+    XLP RSI > 65:    {xlp:>5.1f}  {xlp_bar65}
+
+  Double Signal ({double_met}/2 conditions):
+    GLD RSI > 79:    {gld:>5.1f}  {gld_bar79}
+    USDU RSI < 25:   {usdu:>5.1f}  {usdu_bar25}
+
+DEFENSIVE ROTATION ({def_rotation_met}/3 conditions):
+{sub}
+    XLP RSI > 79:    {xlp:>5.1f}  {xlp_bar79}
+    XLU RSI > 79:    {xlu:>5.1f}  {xlu_bar79}
+    XLV RSI > 79:    {xlv:>5.1f}  {xlv_bar79}
+    SPY RSI < 79:    {spy:>5.1f}  {spy_met}
+    QQQ RSI < 79:    {qqq:>5.1f}  {qqq_met}
+
+VOL HEDGE
+{sub}
+    SPY RSI > 79:    {spy:>5.1f}  {spy_bar79}
+    QQQ RSI > 79:    {qqq:>5.1f}  {qqq_bar79}
+
+SOXS DOLLAR SQUEEZE ({soxs_squeeze_met}/2 conditions):
+{sub}
+    SMH RSI > 79:    {smh:>5.1f}  {smh_bar79}
+    USDU RSI > 70:   {usdu:>5.1f}  {usdu_bar70}
+
+DANGER SIGNALS
+{sub}
+    XLF > 70 + USDU < 25 (NAIL danger):  XLF={xlf:.1f}  USDU={usdu:.1f}  {nail_danger}
+    SPY RSI > 85 (UPRO exit):   {spy:>5.1f}  {spy_bar85}
+    FAS RSI > 85 (FAS exit):    {fas:>5.1f}  {fas_bar85}
+
+DIP BUY PROXIMITY
+{sub}
+    SPY RSI < 25:    {spy:>5.1f}  {spy_bar25}
+    QQQ RSI < 20:    {qqq:>5.1f}  {qqq_bar20}
+    BTC RSI < 30:    {btc:>5.1f}  {btc_bar30}
+    CURE RSI < 25:   {cure:>5.1f}  {cure_bar25}
+    LABU RSI < 25:   {labu:>5.1f}  {labu_bar25}
+    FAS RSI < 30:    {fas:>5.1f}  {fas_bar30}
+
+"""
+
+# Proximity bar bodies indexed by filled cell count (0-12)
+_BARS = tuple('█' * i + '░' * (12 - i) for i in range(13))
+
+# Proximity bars drawn in the playbook section:
+# (template key, ticker, threshold, fires above threshold, blank placeholder)
+_BLANK_BAR = "          —           "
+PLAYBOOK_BARS = (
+    ('gld_bar79', 'GLD', 79, True, _BLANK_BAR),
+    ('usdu_bar25', 'USDU', 25, False, _BLANK_BAR),
+    ('xlp_bar65', 'XLP', 65, True, _BLANK_BAR),
+    ('xlp_bar79', 'XLP', 79, True, '—'),
+    ('xlu_bar79', 'XLU', 79, True, '—'),
+    ('xlv_bar79', 'XLV', 79, True, '—'),
+    ('spy_bar79', 'SPY', 79, True, '—'),
+    ('qqq_bar79', 'QQQ', 79, True, '—'),
+    ('smh_bar79', 'SMH', 79, True, '—'),
+    ('usdu_bar70', 'USDU', 70, True, '—'),
+    ('spy_bar85', 'SPY', 85, True, '—'),
+    ('fas_bar85', 'FAS', 85, True, '—'),
+    ('spy_bar25', 'SPY', 25, False, '—'),
+    ('qqq_bar20', 'QQQ', 20, False, '—'),
+    ('btc_bar30', 'BTC-USD', 30, False, '—'),
+    ('cure_bar25', 'CURE', 25, False, '—'),
+    ('labu_bar25', 'LABU', 25, False, '—'),
+    ('fas_bar30', 'FAS', 30, False, '—'),
+)
+_BAR_KEYS = tuple(spec[0] for spec in PLAYBOOK_BARS)
+_BAR_IDX = np.array([_PLAYBOOK_IDX[spec[1]] for spec in PLAYBOOK_BARS])
+_BAR_THRESHOLDS = np.array([spec[2] for spec in PLAYBOOK_BARS], dtype=float)
+_BAR_ABOVE = np.array([spec[3] for spec in PLAYBOOK_BARS])
+_BAR_BLANKS = tuple(spec[4] for spec in PLAYBOOK_BARS)
+
+def playbook_bars(rsi_view):
+    """Visual proximity bars for every PLAYBOOK_BARS row, keyed by template name.
+    'Above' rows fire when RSI >= threshold, 'below' rows when RSI <= threshold."""
+    curr = rsi_view[_BAR_IDX]
+    thr = _BAR_THRESHOLDS
+    with np.errstate(invalid='ignore'):
+        # 'below' rows are inverted: closer to firing as RSI drops toward threshold
+        pct = np.minimum(np.where(_BAR_ABOVE, curr / thr * 100,
+                                  (100 - curr) / (100 - thr) * 100), 100)
+        active = np.where(_BAR_ABOVE, curr >= thr, curr <= thr)
+        filled = np.where(np.isnan(pct), 0, pct / 100 * 12).astype(int)
+    bars = {}
+    for key, blank, c, p, f, a in zip(_BAR_KEYS, _BAR_BLANKS, curr.tolist(),
+                                      pct.tolist(), filled.tolist(), active.tolist()):
+        if c != c:
+            bars[key] = blank
+        elif a:
+            bars[key] = f"[{_BARS[f]}] ✓ ACTIVE"
+        else:
+            bars[key] = f"[{_BARS[f]}] {p:.0f}%"
+    return bars
+
+def _fmt_price(v):
+    return f"${v:.2f}" if v < 1000 else f"${v:,.0f}"
+
+def _leveraged_signal(ind):
+    rsi_val = ind.rsi10
+    if rsi_val < 21:
+        return "🟢 OVERSOLD"
+    elif rsi_val < 30:
+        return "🟢 Watch"
+    elif rsi_val > 85:
+        return "🔴 OVERBOUGHT"
+    elif rsi_val > 79:
+        return "🟡 Extended"
+    return ""
+
+# Ticker tables: (header, format fragment incl. leading gap, cell fn(ticker, ind))
+_COL_PRICE = ('Price', ' {:>10}', lambda t, i: _fmt_price(i.price))
+_COL_RSI = ('RSI(10)', ' {:>8}', lambda t, i: f"{i.rsi10:.1f}")
+_COL_VS_SMA = ('vsSMA200', ' {:>9}', lambda t, i: f"{i.pct_above_sma200:+.1f}%")
+_COL_EMA_TREND = ('EMA Trend', '  {:>20}', lambda t, i: format_ema_line(i))
+
+COLS_KEY = (
+    ('Ticker', '{:<10}', lambda t, i: t),
+    _COL_PRICE, _COL_RSI, _COL_VS_SMA, _COL_EMA_TREND,
+)
+COLS_LEVERAGED = (
+    ('Ticker', '{:<8}', lambda t, i: t),
+    ('Price', ' {:>10}', lambda t, i: f"${i.price:.2f}"),
+    _COL_RSI, _COL_VS_SMA, _COL_EMA_TREND,
+    ('Signal', '  {}', lambda t, i: _leveraged_signal(i)),
+)
+COLS_OTHER = (
+    ('Ticker', '{:<8}', lambda t, i: t),
+    _COL_PRICE, _COL_RSI, _COL_VS_SMA, _COL_EMA_TREND,
+)
+COLS_EMA = (
+    ('Ticker', '{:<8}', lambda t, i: t),
+    _COL_PRICE,
+    ('EMA(9)', ' {:>10}', lambda t, i: _fmt_price(i.ema9)),
+    ('EMA(20)', ' {:>10}', lambda t, i: _fmt_price(i.ema20)),
+    ('EMA(50)', ' {:>10}', lambda t, i: _fmt_price(i.ema50)),
+    ('EMA(200)', ' {:>10}', lambda t, i: _fmt_price(i.ema200)),
+)
+
+# Rows of the indicator tables, in display order
+KEY_TICKERS = ('SPY', 'QQQ', 'SMH', 'GLD', 'USDU', 'XLP', 'TLT', 'HYG', 'XLF', 'UVXY', 'BTC-USD', 'AMD', 'NVDA')
+LEVERAGED_TICKERS = ('NAIL', 'CURE', 'FAS', 'LABU', 'TQQQ', 'SOXL', 'TECL', 'DRN')
+OTHER_TICKERS = ('XLV', 'XLU', 'XLE', 'TMV', 'VOOV', 'VOOG', 'VTV', 'QQQE', 'BOIL', 'EURL', 'YINN', 'KORU', 'INDL', 'EDC')
+EMA_TICKERS = ('SPY', 'QQQ', 'SMH', 'GLD', 'TLT', 'USDU', 'XLP', 'XLF', 'UVXY', 'BTC-USD',
+               'TQQQ', 'SOXL', 'UPRO', 'TECL', 'NAIL', 'CURE', 'FAS', 'LABU')
+
+# Static email blocks, built once
+def _heading(title):
+    return f"\n{SEP_HEAVY}\n{title}\n{SEP_HEAVY}\n"
+
+# (heading, rows, columns, rule width) of each indicator table, in order
+INDICATOR_TABLES = (
+    (_heading("CURRENT INDICATOR STATUS") + "\n", KEY_TICKERS, COLS_KEY, 62),
+    (_heading("3x LEVERAGED ETFs"), LEVERAGED_TICKERS, COLS_LEVERAGED, 75),
+    (_heading("OTHER ETFs"), OTHER_TICKERS, COLS_OTHER, 60),
+    (_heading("EMA DETAIL — KEY TICKERS"), EMA_TICKERS, COLS_EMA, 62),
+)
+HEAD_SMH_LEVELS = _heading("SMH/SOXL LEVELS")
+PRECLOSE_NOTE = f"""
+{SEP_HEAVY}
+NOTE: This is a PRE-CLOSE preview. Signals may change by market close.
+Final confirmation email will be sent at 4:05 PM ET.
+{SEP_HEAVY}
+"""
+
+def _render_table(tickers, indicators, cols, rule_width):
+    """Header, rule and one row per ticker present in indicators"""
+    row_fmt = ''.join(fmt for _, fmt, _ in cols) + "\n"
+    header = row_fmt.format(*(h for h, _, _ in cols))
+    rows = ''.join(row_fmt.format(*(fn(t, indicators[t]) for _, _, fn in cols))
+                   for t in tickers if t in indicators)
+    return header + "-" * rule_width + "\n" + rows
+
+def partition_alerts(alerts):
+    """Split alerts into (buy, exit/short, warning/watch) lists in one pass"""
+    groups = ([], [], [])
+    for alert in alerts:
+        group = ALERT_GROUPS.get(alert[2])
+        if group is not None:
+            groups[group].append(alert)
+    return groups
+
+def format_email(alerts, status, is_preclose=False, tables=True):
+    """Format the email body (tables=False leaves out the per-ticker tables)"""
     now = datetime.now()
     
     timing = "PRE-CLOSE PREVIEW (3:15 PM)" if is_preclose else "MARKET CLOSE CONFIRMATION (4:05 PM)"
     
-    body = f"""
-{'='*70}
+    buf = io.StringIO()
+    buf.write(f"""
+{SEP_HEAVY}
 MARKET SIGNAL MONITOR v3.0 - {timing}
 {now.strftime('%Y-%m-%d %H:%M')} ET
-{'='*70}
+{SEP_HEAVY}
 
-"""
+""")
     
     # ─── Bond Momentum Status ───
     bm = status.get('bond_momentum', {})
@@ -684,334 +1292,196 @@ MARKET SIGNAL MONITOR v3.0 - {timing}
         tlt_ret = bm.get('tlt_ret10', 0)
         icon = '📈' if bm.get('bonds_rising') else '📉'
         
-        body += f"""{'─'*70}
+        buf.write(f"""{SEP_LIGHT}
 {icon} BOND MOMENTUM: {direction} (TLT 10d: {tlt_ret:+.2f}%)
-"""
+""")
         if bm.get('bonds_rising'):
-            body += "   Interpretation: Bonds bid → rate-cut expectations / risk-on macro\n"
-            body += "   UVXY hedge conviction: MODERATE (50% win when SPY>79)\n"
+            buf.write("   Interpretation: Bonds bid → rate-cut expectations / risk-on macro\n")
+            buf.write("   UVXY hedge conviction: MODERATE (50% win when SPY>79)\n")
         else:
-            body += "   Interpretation: Bonds selling → rate-rise pressure / risk-off\n"
-            body += "   UVXY hedge conviction: HIGH (70% win when SPY>79)\n"
-        body += f"{'─'*70}\n\n"
+            buf.write("   Interpretation: Bonds selling → rate-rise pressure / risk-off\n")
+            buf.write("   UVXY hedge conviction: HIGH (70% win when SPY>79)\n")
+        buf.write(f"{SEP_LIGHT}\n\n")
     
     # ─── Signal Alerts ───
     if alerts:
-        buy_alerts = [a for a in alerts if a[2] == 'buy']
-        exit_alerts = [a for a in alerts if a[2] in ['exit', 'short']]
-        warning_alerts = [a for a in alerts if a[2] in ['warning', 'hedge', 'watch']]
-        
-        if buy_alerts:
-            body += "🟢 BUY SIGNALS:\n" + "-"*50 + "\n"
-            for title, msg, _ in buy_alerts:
-                body += f"{title}\n{msg}\n\n"
-        
-        if exit_alerts:
-            body += "🔴 EXIT/SHORT SIGNALS:\n" + "-"*50 + "\n"
-            for title, msg, _ in exit_alerts:
-                body += f"{title}\n{msg}\n\n"
-        
-        if warning_alerts:
-            body += "🟡 WARNINGS/WATCH:\n" + "-"*50 + "\n"
-            for title, msg, _ in warning_alerts:
-                body += f"{title}\n{msg}\n\n"
+        buy_alerts, exit_alerts, warning_alerts = partition_alerts(alerts)
+        for heading, group in ((ALERT_HEAD_BUY, buy_alerts), (ALERT_HEAD_EXIT, exit_alerts),
+                               (ALERT_HEAD_WARN, warning_alerts)):
+            if group:
+                buf.write(heading)
+                buf.writelines(f"{title}\n{msg}\n\n" for title, msg, _ in group)
     else:
-        body += "No signals triggered today.\n\n"
+        buf.write("No signals triggered today.\n\n")
     
     # ─── Playbook Status ───
     indicators = status.get('indicators', {})
     
-    def _rsi(ticker):
-        return indicators.get(ticker, {}).get('rsi10')
-    
-    def _pct_bar(current, threshold, direction='above'):
-        """Create a visual proximity bar. direction='above' means signal fires when current > threshold."""
-        if current is None:
-            return "          —           "
-        if direction == 'above':
-            pct = (current / threshold) * 100 if threshold > 0 else 0
-            active = current >= threshold
-        else:  # 'below' — signal fires when current < threshold
-            # Invert: closer to firing as current drops toward threshold
-            pct = ((100 - current) / (100 - threshold)) * 100 if threshold < 100 else 0
-            active = current <= threshold
-        
-        pct = min(pct, 100)
-        filled = int(pct / 100 * 12)
-        bar = '█' * filled + '░' * (12 - filled)
-        
-        if active:
-            return f"[{bar}] ✓ ACTIVE"
-        else:
-            return f"[{bar}] {pct:.0f}%"
-    
-    gld_rsi = _rsi('GLD')
-    usdu_rsi = _rsi('USDU')
-    xlp_rsi = _rsi('XLP')
-    xlu_rsi = _rsi('XLU')
-    xlv_rsi = _rsi('XLV')
-    spy_rsi = _rsi('SPY')
-    qqq_rsi = _rsi('QQQ')
-    smh_rsi = _rsi('SMH')
-    xlf_rsi = _rsi('XLF')
-    uvxy_rsi = _rsi('UVXY')
-    btc_rsi = _rsi('BTC-USD')
-    
-    # Count combo signal conditions
-    triple_met = sum([
-        1 if gld_rsi and gld_rsi > 79 else 0,
-        1 if usdu_rsi and usdu_rsi < 25 else 0,
-        1 if xlp_rsi and xlp_rsi > 65 else 0,
-    ])
-    double_met = sum([
-        1 if gld_rsi and gld_rsi > 79 else 0,
-        1 if usdu_rsi and usdu_rsi < 25 else 0,
-    ])
-    def_rotation_met = sum([
-        1 if any(_rsi(t) and _rsi(t) > 79 for t in ['XLP', 'XLU', 'XLV']) else 0,
-        1 if spy_rsi and spy_rsi < 79 else 0,
-        1 if qqq_rsi and qqq_rsi < 79 else 0,
-    ])
-    soxs_squeeze_met = sum([
-        1 if smh_rsi and smh_rsi > 79 else 0,
-        1 if usdu_rsi and usdu_rsi > 70 else 0,
-    ])
-    
-    body += f"""
-{'='*70}
-PLAYBOOK STATUS — Signal Proximity
-{'='*70}
-
-COMBO SIGNALS
-{'─'*50}
-  Triple Signal ({triple_met}/3 conditions):
-    GLD RSI > 79:    {gld_rsi if gld_rsi else 0:>5.1f}  {_pct_bar(gld_rsi, 79, 'above')}
-    USDU RSI < 25:   {usdu_rsi if usdu_rsi else 0:>5.1f}  {_pct_bar(usdu_rsi, 25, 'below')}
-    XLP RSI > 65:    {xlp_rsi if xlp_rsi else 0:>5.1f}  {_pct_bar(xlp_rsi, 65, 'above')}
-
-  Double Signal ({double_met}/2 conditions):
-    GLD RSI > 79:    {gld_rsi if gld_rsi else 0:>5.1f}  {_pct_bar(gld_rsi, 79, 'above')}
-    USDU RSI < 25:   {usdu_rsi if usdu_rsi else 0:>5.1f}  {_pct_bar(usdu_rsi, 25, 'below')}
-
-DEFENSIVE ROTATION ({def_rotation_met}/3 conditions):
-{'─'*50}
-    XLP RSI > 79:    {xlp_rsi if xlp_rsi else 0:>5.1f}  {_pct_bar(xlp_rsi, 79, 'above') if xlp_rsi else '—'}
-    XLU RSI > 79:    {xlu_rsi if xlu_rsi else 0:>5.1f}  {_pct_bar(xlu_rsi, 79, 'above') if xlu_rsi else '—'}
-    XLV RSI > 79:    {xlv_rsi if xlv_rsi else 0:>5.1f}  {_pct_bar(xlv_rsi, 79, 'above') if xlv_rsi else '—'}
-    SPY RSI < 79:    {spy_rsi if spy_rsi else 0:>5.1f}  {'✓ met' if spy_rsi and spy_rsi < 79 else '✗ SPY overbought'}
-    QQQ RSI < 79:    {qqq_rsi if qqq_rsi else 0:>5.1f}  {'✓ met' if qqq_rsi and qqq_rsi < 79 else '✗ QQQ overbought'}
-
-VOL HEDGE
-{'─'*50}
-    SPY RSI > 79:    {spy_rsi if spy_rsi else 0:>5.1f}  {_pct_bar(spy_rsi, 79, 'above') if spy_rsi else '—'}
-    QQQ RSI > 79:    {qqq_rsi if qqq_rsi else 0:>5.1f}  {_pct_bar(qqq_rsi, 79, 'above') if qqq_rsi else '—'}
-
-SOXS DOLLAR SQUEEZE ({soxs_squeeze_met}/2 conditions):
-{'─'*50}
-    SMH RSI > 79:    {smh_rsi if smh_rsi else 0:>5.1f}  {_pct_bar(smh_rsi, 79, 'above') if smh_rsi else '—'}
-    USDU RSI > 70:   {usdu_rsi if usdu_rsi else 0:>5.1f}  {_pct_bar(usdu_rsi, 70, 'above') if usdu_rsi else '—'}
-
-DANGER SIGNALS
-{'─'*50}
-    XLF > 70 + USDU < 25 (NAIL danger):  XLF={xlf_rsi if xlf_rsi else 0:.1f}  USDU={usdu_rsi if usdu_rsi else 0:.1f}  {'⚠️ ACTIVE' if xlf_rsi and usdu_rsi and xlf_rsi > 70 and usdu_rsi < 25 else '— clear'}
-    SPY RSI > 85 (UPRO exit):   {spy_rsi if spy_rsi else 0:>5.1f}  {_pct_bar(spy_rsi, 85, 'above') if spy_rsi else '—'}
-    FAS RSI > 85 (FAS exit):    {_rsi('FAS') or 0:>5.1f}  {_pct_bar(_rsi('FAS'), 85, 'above') if _rsi('FAS') else '—'}
-
-DIP BUY PROXIMITY
-{'─'*50}
-    SPY RSI < 25:    {spy_rsi if spy_rsi else 0:>5.1f}  {_pct_bar(spy_rsi, 25, 'below') if spy_rsi else '—'}
-    QQQ RSI < 20:    {qqq_rsi if qqq_rsi else 0:>5.1f}  {_pct_bar(qqq_rsi, 20, 'below') if qqq_rsi else '—'}
-    BTC RSI < 30:    {btc_rsi if btc_rsi else 0:>5.1f}  {_pct_bar(btc_rsi, 30, 'below') if btc_rsi else '—'}
-    CURE RSI < 25:   {_rsi('CURE') or 0:>5.1f}  {_pct_bar(_rsi('CURE'), 25, 'below') if _rsi('CURE') else '—'}
-    LABU RSI < 25:   {_rsi('LABU') or 0:>5.1f}  {_pct_bar(_rsi('LABU'), 25, 'below') if _rsi('LABU') else '—'}
-    FAS RSI < 30:    {_rsi('FAS') or 0:>5.1f}  {_pct_bar(_rsi('FAS'), 30, 'below') if _rsi('FAS') else '—'}
-
-"""
+    # Gather every playbook RSI in one pass. NaN marks a ticker that wasn't
+    # downloaded; safe_float's 0.0 placeholder is treated the same way
+    rsi_view = np.array([indicators[t].rsi10 if t in indicators else np.nan
+                         for t in PLAYBOOK_TICKERS])
+    rsi_view[~(rsi_view > 0)] = np.nan
+    ix = _PLAYBOOK_IDX
+    rsi = {t: None if np.isnan(v) else v for t, v in zip(PLAYBOOK_TICKERS, rsi_view.tolist())}
+    
+    # Count combo signal conditions (NaN compares False, i.e. not met)
+    over79 = rsi_view > 79
+    usdu_low = rsi_view[ix['USDU']] < 25
+    
+    spy_rsi, qqq_rsi, xlf_rsi, usdu_rsi = rsi['SPY'], rsi['QQQ'], rsi['XLF'], rsi['USDU']
+    ctx = {
+        'sep': SEP_HEAVY, 'sub': SEP_SUB,
+        'triple_met': int(over79[ix['GLD']]) + int(usdu_low) + int(rsi_view[ix['XLP']] > 65),
+        'double_met': int(over79[ix['GLD']]) + int(usdu_low),
+        'def_rotation_met': (int(over79[[ix['XLP'], ix['XLU'], ix['XLV']]].any())
+                             + int(rsi_view[ix['SPY']] < 79) + int(rsi_view[ix['QQQ']] < 79)),
+        'soxs_squeeze_met': int(over79[ix['SMH']]) + int(rsi_view[ix['USDU']] > 70),
+        'spy_met': '✓ met' if spy_rsi and spy_rsi < 79 else '✗ SPY overbought',
+        'qqq_met': '✓ met' if qqq_rsi and qqq_rsi < 79 else '✗ QQQ overbought',
+        'nail_danger': '⚠️ ACTIVE' if xlf_rsi and usdu_rsi and xlf_rsi > 70 and usdu_rsi < 25 else '— clear',
+    }
+    ctx.update(playbook_bars(rsi_view))
+    ctx.update(zip(_PLAYBOOK_KEYS, (value or 0 for value in rsi.values())))
+    buf.write(PLAYBOOK_TEMPLATE.format_map(ctx))
     
     # ─── BOIL/KOLD Natural Gas Section ───
     boil_status = status.get('boil_status', {})
-    weather = status.get('weather', {})
-    uco_rsi = indicators.get('UCO', {}).get('rsi10', 0)
-    uvxy_rsi_ng = indicators.get('UVXY', {}).get('rsi10', 0)
-    usdu_rsi_ng = indicators.get('USDU', {}).get('rsi10', 0)
+    weather = status.get('weather')
+    uco_rsi = indicators['UCO'].rsi10 if 'UCO' in indicators else 0
+    uvxy_rsi_ng = indicators['UVXY'].rsi10 if 'UVXY' in indicators else 0
+    usdu_rsi_ng = indicators['USDU'].rsi10 if 'USDU' in indicators else 0
     
-    body += f"""
-{'='*70}
+    buf.write(f"""
+{SEP_HEAVY}
 🔥 NATURAL GAS (BOIL/KOLD) STATUS
-{'='*70}
+{SEP_HEAVY}
 Signal: {boil_status.get('signal', '⚪ NEUTRAL')}
 Action: {boil_status.get('action', 'No clear signal')}
 
-BOIL: ${boil_status.get('price', 0):.2f} | RSI(10): {boil_status.get('rsi10', 0):.1f}
-5-Day Gain: {boil_status.get('gain_5d', 0):+.1f}% | 7-Day Gain: {boil_status.get('gain_7d', 0):+.1f}%
+BOIL: ${(boil_status.get('price') or 0):.2f} | RSI(10): {(boil_status.get('rsi10') or 0):.1f}
+5-Day Gain: {(boil_status.get('gain_5d') or 0):+.1f}% | 7-Day Gain: {(boil_status.get('gain_7d') or 0):+.1f}%
 
 Macro Filters:
   UCO RSI: {uco_rsi:.1f} ({'>50 ✓ Enhanced' if uco_rsi > 50 else '<50 ⚠️ Weak'})
   UVXY RSI: {uvxy_rsi_ng:.1f}
   USDU RSI: {usdu_rsi_ng:.1f}
-"""
+""")
     if weather:
-        body += f"""Weather (7-day forecast):
+        buf.write(f"""Weather (7-day forecast):
   Current Temp: {weather.get('current_temp', '?')}°F
   7-Day Change: {weather.get('temp_change_7d', 0):+.1f}°F
   Severe Cold: {'YES ⚠️' if weather.get('severe_cold') else 'No'}
-"""
+""")
+    elif weather is None:
+        buf.write("Weather: not fetched (no natgas setup in range)\n")
+    else:
+        buf.write("Weather: unavailable (forecast request failed or timed out)\n")
     if boil_status.get('reasoning'):
-        body += "\n  Signal Reasoning:\n"
+        buf.write("\n  Signal Reasoning:\n")
         for r in boil_status['reasoning']:
-            body += f"  • {r}\n"
+            buf.write(f"  • {r}\n")
     
-    body += f"""
+    buf.write(f"""
 KOLD Entry Thresholds (5-day gain):
-  30% → 88% win, +14.5% avg (n=24)  {'◄ ACTIVE' if boil_status.get('gain_5d', 0) >= 30 else ''}
-  40% → 89% win, +18.5% avg (n=9)   {'◄ ACTIVE' if boil_status.get('gain_5d', 0) >= 40 else ''}
-  50% → 100% win, +25.4% avg (n=7)  {'◄ ACTIVE' if boil_status.get('gain_5d', 0) >= 50 else ''}
-"""
-    
-    # ─── Current Indicator Status ───
-    body += f"""
-{'='*70}
-CURRENT INDICATOR STATUS
-{'='*70}
-
-"""
-    
-    key_tickers = ['SPY', 'QQQ', 'SMH', 'GLD', 'USDU', 'XLP', 'TLT', 'HYG', 'XLF', 'UVXY', 'BTC-USD', 'AMD', 'NVDA']
-    body += f"{'Ticker':<10} {'Price':>10} {'RSI(10)':>8} {'vsSMA200':>9}  {'EMA Trend':>20}\n"
-    body += "-"*62 + "\n"
-    
-    for ticker in key_tickers:
-        if ticker in indicators:
-            ind = indicators[ticker]
-            price = ind['price']
-            price_str = f"${price:.2f}" if price < 1000 else f"${price:,.0f}"
-            rsi = f"{ind['rsi10']:.1f}"
-            pct = f"{ind.get('pct_above_sma200', 0):+.1f}%"
-            ema_trend = format_ema_line(ind, price)
-            body += f"{ticker:<10} {price_str:>10} {rsi:>8} {pct:>9}  {ema_trend:>20}\n"
-    
-    # ─── 3x Leveraged ETFs ───
-    body += f"""
-{'='*70}
-3x LEVERAGED ETFs
-{'='*70}
-"""
-    body += f"{'Ticker':<8} {'Price':>10} {'RSI(10)':>8} {'vsSMA200':>9}  {'EMA Trend':>20}  Signal\n"
-    body += "-"*75 + "\n"
-    
-    leveraged_tickers = ['NAIL', 'CURE', 'FAS', 'LABU', 'TQQQ', 'SOXL', 'TECL', 'DRN']
-    for ticker in leveraged_tickers:
-        if ticker in indicators:
-            ind = indicators[ticker]
-            price = f"${ind['price']:.2f}"
-            rsi = f"{ind['rsi10']:.1f}"
-            pct = f"{ind.get('pct_above_sma200', 0):+.1f}%"
-            ema_trend = format_ema_line(ind, ind['price'])
-            
-            rsi_val = ind['rsi10']
-            if rsi_val < 21:
-                signal = "🟢 OVERSOLD"
-            elif rsi_val < 30:
-                signal = "🟢 Watch"
-            elif rsi_val > 85:
-                signal = "🔴 OVERBOUGHT"
-            elif rsi_val > 79:
-                signal = "🟡 Extended"
-            else:
-                signal = ""
-            
-            body += f"{ticker:<8} {price:>10} {rsi:>8} {pct:>9}  {ema_trend:>20}  {signal}\n"
+  30% → 88% win, +14.5% avg (n=24)  {'◄ ACTIVE' if (boil_status.get('gain_5d') or 0) >= 30 else ''}
+  40% → 89% win, +18.5% avg (n=9)   {'◄ ACTIVE' if (boil_status.get('gain_5d') or 0) >= 40 else ''}
+  50% → 100% win, +25.4% avg (n=7)  {'◄ ACTIVE' if (boil_status.get('gain_5d') or 0) >= 50 else ''}
+""")
     
-    # ─── Other ETFs ───
-    body += f"""
-{'='*70}
-OTHER ETFs
-{'='*70}
-"""
-    body += f"{'Ticker':<8} {'Price':>10} {'RSI(10)':>8} {'vsSMA200':>9}  {'EMA Trend':>20}\n"
-    body += "-"*60 + "\n"
+    if tables:
+        _write_indicator_tables(buf, indicators, status)
     
-    other_tickers = ['XLV', 'XLU', 'XLE', 'TMV', 'VOOV', 'VOOG', 'VTV', 'QQQE', 'BOIL', 'EURL', 'YINN', 'KORU', 'INDL', 'EDC']
-    for ticker in other_tickers:
-        if ticker in indicators:
-            ind = indicators[ticker]
-            price = ind['price']
-            price_str = f"${price:.2f}" if price < 1000 else f"${price:,.0f}"
-            rsi = f"{ind['rsi10']:.1f}"
-            pct = f"{ind.get('pct_above_sma200', 0):+.1f}%"
-            ema_trend = format_ema_line(ind, price)
-            body += f"{ticker:<8} {price_str:>10} {rsi:>8} {pct:>9}  {ema_trend:>20}\n"
-    
-    # ─── EMA Detail Table (Key Tickers) ───
-    body += f"""
-{'='*70}
-EMA DETAIL — KEY TICKERS
-{'='*70}
-"""
-    body += f"{'Ticker':<8} {'Price':>10} {'EMA(9)':>10} {'EMA(20)':>10} {'EMA(50)':>10} {'EMA(200)':>10}\n"
-    body += "-"*62 + "\n"
+    if is_preclose:
+        buf.write(PRECLOSE_NOTE)
     
-    ema_tickers = ['SPY', 'QQQ', 'SMH', 'GLD', 'TLT', 'USDU', 'XLP', 'XLF', 'UVXY', 'BTC-USD', 
-                   'TQQQ', 'SOXL', 'UPRO', 'TECL', 'NAIL', 'CURE', 'FAS', 'LABU']
-    for ticker in ema_tickers:
-        if ticker in indicators:
-            ind = indicators[ticker]
-            p = ind['price']
-            fmt = lambda v: f"${v:.2f}" if v < 1000 else f"${v:,.0f}"
-            body += f"{ticker:<8} {fmt(p):>10} {fmt(ind['ema9']):>10} {fmt(ind['ema20']):>10} {fmt(ind['ema50']):>10} {fmt(ind['ema200']):>10}\n"
+    return buf.getvalue()
+
+def _write_indicator_tables(buf, indicators, status):
+    """Indicator status, ETF, EMA detail and SMH level sections of the body"""
+    # ─── Indicator status, 3x leveraged, other ETFs, EMA detail ───
+    for heading, tickers, cols, rule_width in INDICATOR_TABLES:
+        buf.write(heading)
+        buf.write(_render_table(tickers, indicators, cols, rule_width))
     
     # ─── SMH/SOXL Levels ───
     if 'SMH' in indicators:
         smh = indicators['SMH']
-        sma200 = smh['sma200']
-        body += f"""
-{'='*70}
-SMH/SOXL LEVELS
-{'='*70}
-Current Price:    ${smh['price']:.2f}
+        sma200 = smh.sma200
+        buf.write(HEAD_SMH_LEVELS)
+        buf.write(f"""Current Price:    ${smh.price:.2f}
 SMA(200):         ${sma200:.2f}
-EMA(9):           ${smh['ema9']:.2f}  {'✓ above' if smh['above_ema9'] else '✗ below'}
-EMA(20):          ${smh['ema20']:.2f}  {'✓ above' if smh['above_ema20'] else '✗ below'}
-EMA(50):          ${smh['ema50']:.2f}  {'✓ above' if smh['above_ema50'] else '✗ below'}
-% Above SMA200:   {smh['pct_above_sma200']:+.1f}%
+EMA(9):           ${smh.ema9:.2f}  {'✓ above' if smh.above_ema9 else '✗ below'}
+EMA(20):          ${smh.ema20:.2f}  {'✓ above' if smh.above_ema20 else '✗ below'}
+EMA(50):          ${smh.ema50:.2f}  {'✓ above' if smh.above_ema50 else '✗ below'}
+% Above SMA200:   {smh.pct_above_sma200:+.1f}%
 Days Below SMA:   {status.get('smh_days_below_sma200', 0)}
 
 Key Levels:
   30% (Trim):     ${sma200 * 1.30:.2f}
   35% (Warning):  ${sma200 * 1.35:.2f}
   40% (Sell):     ${sma200 * 1.40:.2f}
-"""
-    
-    if is_preclose:
-        body += f"""
-{'='*70}
-NOTE: This is a PRE-CLOSE preview. Signals may change by market close.
-Final confirmation email will be sent at 4:05 PM ET.
-{'='*70}
-"""
-    
-    return body
+""")
+
+_SMTP = None
+
+def _smtp_connection():
+    """Logged-in Gmail SMTP connection, opened on first use and then reused"""
+    global _SMTP
+    if _SMTP is not None:
+        # Gmail drops idle sessions after a few minutes; a NOOP round-trip is
+        # far cheaper than discovering it mid-send
+        try:
+            alive = _SMTP.noop()[0] == 250
+        except OSError:  # SMTPException and socket errors
+            alive = False
+        if not alive:
+            _close_smtp()
+    if _SMTP is None:
+        _SMTP = smtplib.SMTP('smtp.gmail.com', 587)
+        _SMTP.starttls()
+        _SMTP.login(SENDER_EMAIL, SENDER_PASSWORD)
+    return _SMTP
+
+@atexit.register
+def _close_smtp():
+    """Drop the cached SMTP connection (QUIT if the server is still there)"""
+    global _SMTP
+    if _SMTP is not None:
+        try:
+            _SMTP.quit()
+        except Exception:
+            pass
+        _SMTP = None
+
+def _send_8bit(smtp, msg):
+    """send_message with BODY=8BITMIME declared when the server offers it"""
+    options = ['BODY=8BITMIME'] if smtp.has_extn('8bitmime') else []
+    smtp.send_message(msg, mail_options=options)
 
 def send_email(subject, body):
     """Send email alert"""
-    if not SENDER_EMAIL or not SENDER_PASSWORD or not RECIPIENT_EMAIL:
+    if not EMAIL_CONFIGURED:
         print("Email not configured - printing to console:")
         print(f"Subject: {subject}")
         print(body)
         return False
     
     try:
-        msg = MIMEMultipart()
+        msg = EmailMessage()
         msg['From'] = SENDER_EMAIL
         msg['To'] = RECIPIENT_EMAIL
         msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+        # Raw UTF-8 body: the box-drawing/emoji glyphs would otherwise push
+        # the default choice to base64 and grow the message by about a third
+        msg.set_content(body, cte='8bit')
         
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+        try:
+            _send_8bit(_smtp_connection(), msg)
+        except smtplib.SMTPServerDisconnected:
+            # Server closed the idle connection — reconnect once and retry
+            _close_smtp()
+            _send_8bit(_smtp_connection(), msg)
         
         print(f"Email sent successfully to {RECIPIENT_EMAIL}")
         return True
@@ -1022,48 +1492,32 @@ def send_email(subject, body):
 # =============================================================================
 # MAIN
 # =============================================================================
+def is_trading_day(day):
+    """True if NYSE holds a regular session on `day`"""
+    return bool(np.is_busday(np.datetime64(day, 'D'), holidays=NYSE_HOLIDAYS))
+
+
 def main():
     print(f"Running signal check at {datetime.now()}")
     print(f"Mode: {'PRE-CLOSE (3:15 PM)' if IS_PRECLOSE else 'MARKET CLOSE (4:05 PM)'}")
+    if datetime.now().year > NYSE_HOLIDAYS_LAST_YEAR:
+        print(f"WARNING: NYSE_HOLIDAYS ends in {NYSE_HOLIDAYS_LAST_YEAR} - "
+              f"holidays are not skipped until the table is extended")
     
-    tickers = [
-        # Core Indices
-        'SMH', 'SPY', 'QQQ', 'IWM',
-        # Defensive Sectors
-        'XLP', 'XLU', 'XLV',
-        # Safe Havens & Macro
-        'GLD', 'TLT', 'HYG', 'LQD', 'TMV',
-        'USDU', 'UCO', 'BOIL',
-        # Bonds (for bond momentum)
-        'BND',
-        # Volatility
-        'UVXY',
-        # International
-        'EDC', 'YINN', 'KORU', 'EURL', 'INDL',
-        # Crypto
-        'BTC-USD',
-        # Individual Stocks
-        'AMD', 'NVDA',
-        # 3x Leveraged ETFs
-        'NAIL', 'CURE', 'FAS', 'LABU',
-        'TQQQ', 'SOXL', 'TECL', 'DRN', 'UPRO',
-        # Style/Factor ETFs
-        'VOOV', 'VOOG', 'VTV', 'QQQE',
-        # Energy/Financials
-        'XLE', 'XLF',
-        # Natural Gas (KOLD for fade signals)
-        'KOLD',
-    ]
+    # Manual runs always go through; scheduled runs skip closed sessions
+    if os.environ.get('GITHUB_EVENT_NAME') != 'workflow_dispatch' and not is_trading_day(datetime.now().date()):
+        print("Market closed today - skipping download and email")
+        return
     
     print("Downloading market data...")
-    data = download_data(tickers)
+    data = download_data_cached(TICKERS)
     print(f"Downloaded data for {len(data)} tickers")
     
     alerts, status = check_signals(data)
     
     if alerts:
-        buy_count = len([a for a in alerts if a[2] == 'buy'])
-        exit_count = len([a for a in alerts if a[2] in ['exit', 'short']])
+        buy_alerts, exit_alerts, _ = partition_alerts(alerts)
+        buy_count, exit_count = len(buy_alerts), len(exit_alerts)
         
         if exit_count > 0:
             emoji = "🔴"
@@ -1081,7 +1535,9 @@ def main():
         timing = "PRE-CLOSE" if IS_PRECLOSE else "CLOSE"
         subject = f"📊 [{timing}] Market Signals: No Alerts"
     
-    body = format_email(alerts, status, IS_PRECLOSE)
+    # The per-ticker tables only matter when there is a reader: an actual
+    # email, or an alert worth digging into from the console log
+    body = format_email(alerts, status, IS_PRECLOSE, tables=bool(alerts) or EMAIL_CONFIGURED)
     send_email(subject, body)
     
     print(f"\n{len(alerts)} signal(s) detected")
@@ -8,6 +8,7 @@ and other tools. Matches signal_monitor_complete.py calculations exactly.
 USAGE:
   python snapshot_generator.py              # Full snapshot
   python snapshot_generator.py --compact    # Minimal output (smaller file)
+  python snapshot_generator.py --no-cache   # Ignore today's price cache, full download
 
 OUTPUT:
   data/snapshot.json — Full signal state
@@ -20,11 +21,31 @@ SCHEDULE:
 import os
 import sys
 import json
+import gzip
+import pickle
+import hashlib
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional — the RSI/EMA kernels run as plain Python without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional — falls back to the stdlib encoder
+    orjson = None
 
 # =============================================================================
 # CONFIGURATION
@@ -32,6 +53,12 @@ from pathlib import Path
 OUTPUT_DIR = Path("data")
 OUTPUT_FILE = OUTPUT_DIR / "snapshot.json"
 
+# Exchange time zone for the ET timestamps (DST-aware)
+MARKET_TZ = ZoneInfo('America/New_York')
+
+# Same-day download cache shared by the 15-minute runs
+CACHE_DIR = Path(".cache")
+
 # Complete ticker list — union of signal_monitor + polygon_downloader + dashboard extras
 TICKERS = [
     # Core Indices
@@ -59,19 +86,34 @@ TICKERS = [
     'KMLM', 'DBMF', 'CTA', 'BTAL',
 ]
 
-# Playbook signal thresholds
-PLAYBOOK = {
-    'GLD_RSI_ABOVE': 79,
-    'USDU_RSI_BELOW': 25,
-    'XLP_RSI_ABOVE_TRIPLE': 65,
-    'XLP_RSI_ABOVE_CASCADE': 75,
-    'SPY_RSI_ABOVE': 79,
-    'QQQ_RSI_ABOVE': 79,
-    'SMH_RSI_ABOVE': 79,
-    'XLF_RSI_ABOVE': 70,
-    'UVXY_RSI_ABOVE': 82,
-    'VIXM_RSI_BELOW': 25,
-}
+# Tickers kept in --compact snapshots
+COMPACT_KEYS = frozenset({
+    'SPY', 'QQQ', 'SMH', 'GLD', 'USDU', 'XLP', 'TLT', 'UVXY',
+    'SVXY', 'VIXM', 'TQQQ', 'SOXL', 'UPRO', 'FAS', 'TECL',
+    'FNGO', 'KMLM', 'BTAL', 'BND', 'BTC-USD',
+})
+
+# Playbook signal thresholds: (ticker, comparison, RSI(10) threshold).
+# Rows become the '<TICKER>_RSI_<op>_<threshold>' playbook entries in order.
+PLAYBOOK_RULES = (
+    ('GLD', 'gt', 79),
+    ('USDU', 'lt', 25),
+    ('XLP', 'gt', 65),
+    ('XLP', 'gt', 75),
+    ('SPY', 'gt', 79),
+    ('QQQ', 'gt', 79),
+    ('SMH', 'gt', 79),
+    ('XLF', 'gt', 70),
+    ('UVXY', 'gt', 82),
+    ('VIXM', 'lt', 25),
+)
+
+# Contrarian weakness setups (always reported) and extended-rally watch list
+CONTRARIAN_TICKERS = ('FAS', 'TECL', 'FNGO', 'LABU', 'NAIL')
+EXTENDED_TICKERS = ('SOXL', 'KORU', 'EDC', 'HIBL', 'LABU', 'SMH')
+
+# EMA spans reported per ticker (ema9/20/50/200)
+EMA_SPANS = np.array([9.0, 20.0, 50.0, 200.0])
 
 # SMH / SOXL levels
 SMH_LEVELS = {
@@ -80,24 +122,63 @@ SMH_LEVELS = {
     'sell': 40,    # → exit
 }
 
+# SMA200 multipliers for each level, folded once
+SMH_MULT = {k: 1 + v / 100 for k, v in SMH_LEVELS.items()}
+
 # =============================================================================
 # CALCULATIONS — exact match to signal_monitor_complete.py
 # =============================================================================
-def calculate_rsi_wilder(prices, period):
-    """Wilder's RSI — matches signal monitor exactly."""
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+@njit(cache=True)
+def last_indicators(prices, rsi_period, spans):
+    """Latest Wilder's RSI and ewm(span, adjust=False) EMAs from one pass
+    over a 1-D float array.
+
+    RSI matches the monitor's Wilder recurrence (ewm seeded at the first
+    bar); the EMAs use pandas' NaN handling, where a gap decays the weight of
+    the running average instead of resetting it.
+    """
+    n = len(prices)
+    k = len(spans)
+    alpha = 1.0 / rsi_period
+    avg_gain = 0.0
+    avg_loss = 0.0
+    ema_alpha = 2.0 / (spans + 1.0)
+    emas = np.full(k, prices[0])
+    weights = np.ones(k)
+    for i in range(1, n):
+        x = prices[i]
+        delta = x - prices[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (1.0 - alpha) * avg_gain + alpha * gain
+        avg_loss = (1.0 - alpha) * avg_loss + alpha * loss
+        for j in range(k):
+            avg = emas[j]
+            if avg == avg:
+                weights[j] *= 1.0 - ema_alpha[j]
+                if x == x:
+                    if avg != x:
+                        emas[j] = (weights[j] * avg + ema_alpha[j] * x) / (weights[j] + ema_alpha[j])
+                    weights[j] = 1.0
+            elif x == x:
+                emas[j] = x
+    if n < rsi_period:
+        rsi = np.nan
+    elif avg_loss == 0:
+        rsi = 100.0 if avg_gain > 0 else np.nan
+    else:
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return rsi, emas
 
 
 def safe_float(value):
     """Safely convert to float, handling Series/arrays/NaN."""
+    # Fast path: kernels and array reads hand back plain/numpy floats
+    t = type(value)
+    if t is float or t is np.float64:
+        return float(value) if value == value else None
     if isinstance(value, pd.Series):
-        return float(value.iloc[-1]) if len(value) > 0 else None
+        return float(value.iat[-1]) if len(value) > 0 else None
     elif isinstance(value, np.ndarray):
         return float(value[-1]) if len(value) > 0 else None
     elif pd.isna(value):
@@ -112,25 +193,25 @@ def compute_indicators(df):
         return None
 
     try:
-        close = df['Close']
-        price = safe_float(close.iloc[-1])
-        prev_close = safe_float(close.iloc[-2]) if len(close) > 1 else price
-
-        rsi10 = safe_float(calculate_rsi_wilder(close, 10).iloc[-1])
+        # Scalars come straight from the tail of one float64 array
+        arr = df['Close'].to_numpy(dtype=np.float64)
+        n = len(arr)
+        price = safe_float(arr[-1])
+        prev_close = safe_float(arr[-2]) if n > 1 else price
 
-        sma50 = safe_float(close.rolling(50).mean().iloc[-1])
-        sma200 = safe_float(close.rolling(200).mean().iloc[-1])
+        sma50 = safe_float(arr[-50:].mean())
+        sma200 = safe_float(arr[-200:].mean())
 
-        ema9 = safe_float(close.ewm(span=9, adjust=False).mean().iloc[-1])
-        ema20 = safe_float(close.ewm(span=20, adjust=False).mean().iloc[-1])
-        ema50 = safe_float(close.ewm(span=50, adjust=False).mean().iloc[-1])
-        ema200 = safe_float(close.ewm(span=200, adjust=False).mean().iloc[-1])
+        # RSI(10) and all four EMAs in one pass over the closes
+        rsi10, emas = last_indicators(arr, 10, EMA_SPANS)
+        rsi10 = safe_float(rsi10)
+        ema9, ema20, ema50, ema200 = (safe_float(e) for e in emas)
 
         # Returns
         ret_1d = (price / prev_close - 1) * 100 if prev_close else None
-        ret_5d = safe_float((close.iloc[-1] / close.iloc[-6] - 1) * 100) if len(close) > 6 else None
-        ret_10d = safe_float((close.iloc[-1] / close.iloc[-11] - 1) * 100) if len(close) > 11 else None
-        ret_20d = safe_float((close.iloc[-1] / close.iloc[-21] - 1) * 100) if len(close) > 21 else None
+        ret_5d = safe_float((arr[-1] / arr[-6] - 1) * 100) if n > 6 else None
+        ret_10d = safe_float((arr[-1] / arr[-11] - 1) * 100) if n > 11 else None
+        ret_20d = safe_float((arr[-1] / arr[-21] - 1) * 100) if n > 21 else None
 
         # Derived
         vs_sma200 = ((price / sma200) - 1) * 100 if sma200 and sma200 > 0 else None
@@ -143,8 +224,8 @@ def compute_indicators(df):
 
         return {
             'price': round(price, 2) if price else None,
-            'change_pct': round(ret_1d, 2) if ret_1d else None,
-            'rsi10': round(rsi10, 1) if rsi10 else None,
+            'change_pct': round(ret_1d, 2) if ret_1d is not None else None,
+            'rsi10': round(rsi10, 1) if rsi10 is not None else None,
             'ema9': round(ema9, 2) if ema9 else None,
             'ema20': round(ema20, 2) if ema20 else None,
             'ema50': round(ema50, 2) if ema50 else None,
@@ -174,42 +255,44 @@ def compute_indicators(df):
 # =============================================================================
 # SIGNAL EVALUATION
 # =============================================================================
+# Shared read-only default for tickers missing from indicators (never mutated)
+_EMPTY = {}
+
+
+def _gt(value, threshold):
+    """value > threshold, False when the value is missing (0.0 still counts)."""
+    return value is not None and value > threshold
+
+
+def _lt(value, threshold):
+    """value < threshold, False when the value is missing (0.0 still counts)."""
+    return value is not None and value < threshold
+
+
 def evaluate_signals(indicators):
     """Evaluate all playbook signals and return structured state."""
     signals = {}
 
-    def rsi(ticker):
-        return indicators.get(ticker, {}).get('rsi10')
+    # One flat ticker → RSI(10) table instead of a chained .get per lookup
+    rsi10 = {ticker: ind.get('rsi10') for ticker, ind in indicators.items()}
+    rsi = rsi10.get
 
     # --- Playbook conditions ---
-    gld_rsi = rsi('GLD')
-    usdu_rsi = rsi('USDU')
-    xlp_rsi = rsi('XLP')
-    spy_rsi = rsi('SPY')
-    qqq_rsi = rsi('QQQ')
-    smh_rsi = rsi('SMH')
-    xlf_rsi = rsi('XLF')
-    uvxy_rsi = rsi('UVXY')
-    vixm_rsi = rsi('VIXM')
-
-    signals['playbook'] = {
-        'GLD_RSI_gt_79': {'value': gld_rsi, 'threshold': 79, 'active': gld_rsi > 79 if gld_rsi else False},
-        'USDU_RSI_lt_25': {'value': usdu_rsi, 'threshold': 25, 'active': usdu_rsi < 25 if usdu_rsi else False},
-        'XLP_RSI_gt_65': {'value': xlp_rsi, 'threshold': 65, 'active': xlp_rsi > 65 if xlp_rsi else False},
-        'XLP_RSI_gt_75': {'value': xlp_rsi, 'threshold': 75, 'active': xlp_rsi > 75 if xlp_rsi else False},
-        'SPY_RSI_gt_79': {'value': spy_rsi, 'threshold': 79, 'active': spy_rsi > 79 if spy_rsi else False},
-        'QQQ_RSI_gt_79': {'value': qqq_rsi, 'threshold': 79, 'active': qqq_rsi > 79 if qqq_rsi else False},
-        'SMH_RSI_gt_79': {'value': smh_rsi, 'threshold': 79, 'active': smh_rsi > 79 if smh_rsi else False},
-        'XLF_RSI_gt_70': {'value': xlf_rsi, 'threshold': 70, 'active': xlf_rsi > 70 if xlf_rsi else False},
-        'UVXY_RSI_gt_82': {'value': uvxy_rsi, 'threshold': 82, 'active': uvxy_rsi > 82 if uvxy_rsi else False},
-        'VIXM_RSI_lt_25': {'value': vixm_rsi, 'threshold': 25, 'active': vixm_rsi < 25 if vixm_rsi else False},
-    }
+    playbook = {}
+    for ticker, op, threshold in PLAYBOOK_RULES:
+        value = rsi(ticker)
+        playbook[f'{ticker}_RSI_{op}_{threshold}'] = {
+            'value': value,
+            'threshold': threshold,
+            'active': _gt(value, threshold) if op == 'gt' else _lt(value, threshold),
+        }
+    signals['playbook'] = playbook
 
     # --- Combo signals ---
-    gld_active = gld_rsi and gld_rsi > 79
-    usdu_active = usdu_rsi and usdu_rsi < 25
-    xlp_65_active = xlp_rsi and xlp_rsi > 65
-    xlp_75_active = xlp_rsi and xlp_rsi > 75
+    gld_active = playbook['GLD_RSI_gt_79']['active']
+    usdu_active = playbook['USDU_RSI_lt_25']['active']
+    xlp_65_active = playbook['XLP_RSI_gt_65']['active']
+    xlp_75_active = playbook['XLP_RSI_gt_75']['active']
 
     signals['combos'] = {
         'double_signal': {
@@ -229,8 +312,8 @@ def evaluate_signals(indicators):
     }
 
     # --- Bond momentum ---
-    tlt_ind = indicators.get('TLT', {})
-    bnd_ind = indicators.get('BND', {})
+    tlt_ind = indicators.get('TLT', _EMPTY)
+    bnd_ind = indicators.get('BND', _EMPTY)
     tlt_ret10 = tlt_ind.get('ret_10d')
     bnd_ret10 = bnd_ind.get('ret_10d')
     bonds_rising = tlt_ret10 > 0 if tlt_ret10 is not None else None
@@ -250,7 +333,7 @@ def evaluate_signals(indicators):
     }
 
     # --- SMH / SOXL levels ---
-    smh_ind = indicators.get('SMH', {})
+    smh_ind = indicators.get('SMH', _EMPTY)
     smh_vs200 = smh_ind.get('vs_sma200')
     smh_sma200 = smh_ind.get('sma200')
     smh_price = smh_ind.get('price')
@@ -259,16 +342,16 @@ def evaluate_signals(indicators):
         'price': smh_price,
         'sma200': smh_sma200,
         'pct_above': round(smh_vs200, 1) if smh_vs200 is not None else None,
-        'trim_level': round(smh_sma200 * (1 + SMH_LEVELS['trim'] / 100), 2) if smh_sma200 else None,
-        'warn_level': round(smh_sma200 * (1 + SMH_LEVELS['warn'] / 100), 2) if smh_sma200 else None,
-        'sell_level': round(smh_sma200 * (1 + SMH_LEVELS['sell'] / 100), 2) if smh_sma200 else None,
+        'trim_level': round(smh_sma200 * SMH_MULT['trim'], 2) if smh_sma200 else None,
+        'warn_level': round(smh_sma200 * SMH_MULT['warn'], 2) if smh_sma200 else None,
+        'sell_level': round(smh_sma200 * SMH_MULT['sell'], 2) if smh_sma200 else None,
     }
 
     # --- Contrarian weakness setups ---
     contrarian = {}
-    for ticker in ['FAS', 'TECL', 'FNGO', 'LABU', 'NAIL']:
-        ind = indicators.get(ticker, {})
-        r = ind.get('rsi10')
+    for ticker in CONTRARIAN_TICKERS:
+        ind = indicators.get(ticker, _EMPTY)
+        r = rsi(ticker)
         below_200 = ind.get('above_sma200') is False
         bear_ema = ind.get('ema_cross') == 'BEAR'
         
@@ -289,14 +372,12 @@ def evaluate_signals(indicators):
 
     # --- Extended / overbought warnings ---
     extended = {}
-    for ticker in ['SOXL', 'KORU', 'EDC', 'HIBL', 'LABU', 'SMH']:
-        ind = indicators.get(ticker, {})
-        vs200 = ind.get('vs_sma200')
-        r = ind.get('rsi10')
+    for ticker in EXTENDED_TICKERS:
+        vs200 = indicators.get(ticker, _EMPTY).get('vs_sma200')
         if vs200 is not None and vs200 > 50:
             extended[ticker] = {
                 'vs_sma200': vs200,
-                'rsi10': r,
+                'rsi10': rsi(ticker),
                 'warning': 'EXTENDED' if vs200 > 100 else 'ELEVATED',
             }
     signals['extended'] = extended
@@ -323,25 +404,109 @@ def evaluate_signals(indicators):
 
 
 # =============================================================================
-# MAIN
+# DATA
 # =============================================================================
-def main():
-    compact = '--compact' in sys.argv
+def _download_one(ticker, period):
+    """Single-ticker download (thread-safe), used to retry batch misses."""
+    try:
+        df = yf.Ticker(ticker).history(period=period, actions=False)[['Close']]
+        if len(df) > 0:
+            df.index = df.index.tz_localize(None)
+            return df
+    except Exception as e:
+        print(f"  Error downloading {ticker}: {e}")
+    return None
 
-    print(f"Generating signal snapshot at {datetime.now()}")
-    print(f"Downloading data for {len(TICKERS)} tickers...")
 
-    # Download all data
+def download_data(tickers, period='2y'):
+    """Download every ticker in one batched request, retrying any it missed."""
     data = {}
-    for ticker in TICKERS:
+    try:
+        raw = yf.download(list(tickers), period=period, group_by='ticker',
+                          threads=True, progress=False)
+        downloaded = set(raw.columns.get_level_values(0))
+    except Exception as e:
+        print(f"  Error downloading batch: {e}")
+        downloaded = set()
+
+    # Split per ticker; drop rows that only exist on other calendars (BTC).
+    # compute_indicators reads Close only, so OHLV never reaches the cache
+    for ticker in tickers:
+        if ticker not in downloaded:
+            continue
         try:
-            df = yf.download(ticker, period='2y', progress=False)
+            df = raw[ticker][['Close']].dropna(how='all')
             if len(df) > 0:
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
                 data[ticker] = df
         except Exception as e:
             print(f"  Error downloading {ticker}: {e}")
+
+    missing = [t for t in tickers if t not in data]
+    if missing:
+        print(f"  Retrying {len(missing)} ticker(s) individually: {', '.join(missing)}")
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            for ticker, df in zip(missing, pool.map(lambda t: _download_one(t, period), missing)):
+                if df is not None:
+                    data[ticker] = df
+        data = {t: data[t] for t in tickers if t in data}
+    return data
+
+
+def _price_cache_path(tickers):
+    """Same-day cache file for a ticker set."""
+    key = hashlib.sha1(','.join(sorted(tickers)).encode()).hexdigest()[:8]
+    return CACHE_DIR / f"prices_{datetime.now():%Y%m%d}_{key}.pkl.gz"
+
+
+def download_data_cached(tickers, period='2y'):
+    """Download data, refreshing only the last 5d over today's cached copy."""
+    path = _price_cache_path(tickers)
+    cached = {}
+    if path.exists():
+        try:
+            with gzip.open(path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            print(f"  Error reading price cache: {e}")
+
+    if cached:
+        fresh = download_data([t for t in tickers if t in cached], period='5d')
+        data = {}
+        for ticker, recent in fresh.items():
+            df = pd.concat([cached[ticker], recent])
+            data[ticker] = df[~df.index.duplicated(keep='last')].sort_index()
+        missing = [t for t in tickers if t not in data]
+        if missing:
+            data.update(download_data(missing, period=period))
+        data = {t: data[t] for t in tickers if t in data}
+        print(f"  Price cache hit: refreshed {len(fresh)} tickers, full download for {len(missing)}")
+    else:
+        data = download_data(tickers, period=period)
+
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        for stale in CACHE_DIR.glob('prices_*'):
+            if stale != path:
+                stale.unlink()
+        with gzip.open(path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"  Error writing price cache: {e}")
+    return data
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    compact = '--compact' in sys.argv
+    use_cache = '--no-cache' not in sys.argv
+
+    print(f"Generating signal snapshot at {datetime.now()}")
+    print(f"Downloading data for {len(TICKERS)} tickers...")
+
+    # Download all data (incremental after the day's first run)
+    data = download_data_cached(TICKERS) if use_cache else download_data(TICKERS)
     
     print(f"Downloaded data for {len(data)} tickers")
 
@@ -359,9 +524,7 @@ def main():
 
     # Build snapshot
     now_utc = datetime.now(timezone.utc)
-    # Eastern time offset (simplified — doesn't handle DST perfectly but close enough)
-    et_offset = timedelta(hours=-5)
-    now_et = now_utc + et_offset
+    now_et = now_utc.astimezone(MARKET_TZ)
 
     snapshot = {
         'meta': {
@@ -377,15 +540,25 @@ def main():
         snapshot['indicators'] = indicators
     else:
         # Compact: only include key tickers + any with active signals
-        key_set = {'SPY', 'QQQ', 'SMH', 'GLD', 'USDU', 'XLP', 'TLT', 'UVXY',
-                    'SVXY', 'VIXM', 'TQQQ', 'SOXL', 'UPRO', 'FAS', 'TECL',
-                    'FNGO', 'KMLM', 'BTAL', 'BND', 'BTC-USD'}
-        snapshot['indicators'] = {k: v for k, v in indicators.items() if k in key_set}
+        snapshot['indicators'] = {k: v for k, v in indicators.items() if k in COMPACT_KEYS}
 
     # Write output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_FILE, 'w') as f:
-        json.dump(snapshot, f, indent=2, default=str)
+    # Compact mode drops the indentation and the spaces after separators.
+    # Written to a temp file and renamed so readers never see a partial file
+    tmp = OUTPUT_FILE.with_suffix('.json.tmp')
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        tmp.write_bytes(orjson.dumps(snapshot, option=option))
+    else:
+        with open(tmp, 'w') as f:
+            if compact:
+                json.dump(snapshot, f, separators=(',', ':'))
+            else:
+                json.dump(snapshot, f, indent=2)
+    os.replace(tmp, OUTPUT_FILE)
 
     print(f"\nSnapshot written to {OUTPUT_FILE}")
     print(f"File size: {OUTPUT_FILE.stat().st_size:,} bytes")